@@ -1,51 +1,122 @@
 import os
+import time
 from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
 from flask import Flask, jsonify
+from sqlalchemy import text
 from flask_jwt_extended import JWTManager
 
-from .db import db, init_db
+from .db import db, engine_options, init_db, pool_status
 
 jwt = JWTManager()
 
 
 def create_app() -> Flask:
+    # Imported here rather than at module level so that importing the package
+    # (as Alembic does for ``app.db``/``app.models``) stays cheap and does no I/O.
+    from .compression import init_compression
+    from .json_provider import OrjsonProvider
+    from .metrics import init_metrics
+    from .profiling import init_profiling
+    from .query_budget import init_query_budget
+    from .replicas import init_replicas, replica_binds
+    from .routes import auth, courses, diagnostics, instructor, lessons, payments, uploads
+    from .services.events import init_events
+    from .slow_queries import init_slow_query_log
+
     base_dir = Path(__file__).resolve().parent
     env_path = base_dir.parent / ".env"
     load_dotenv(env_path)
 
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
         "DATABASE_URL", "sqlite:///app.db"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["SQLALCHEMY_BINDS"] = replica_binds(engine_options)
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET", "change-me")
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(
         seconds=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "3600"))
     )
+    app.config["UPLOAD_ROOT"] = os.getenv(
+        "UPLOAD_ROOT", str(Path(app.instance_path) / "uploads")
+    )
+    app.config["UPLOAD_CHUNK_MAX_BYTES"] = int(
+        os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    app.config["UPLOAD_SIGNING_SECRET"] = os.getenv(
+        "UPLOAD_SIGNING_SECRET", app.config["JWT_SECRET_KEY"]
+    )
+    app.config["UPLOAD_URL_TTL_SECONDS"] = int(os.getenv("UPLOAD_URL_TTL_SECONDS", "3600"))
+    app.config["DOWNLOAD_URL_TTL_SECONDS"] = int(os.getenv("DOWNLOAD_URL_TTL_SECONDS", "900"))
+    app.config["STORAGE_QUOTA_BYTES"] = int(
+        os.getenv("STORAGE_QUOTA_BYTES", str(5 * 1024 * 1024 * 1024))
+    )
+    app.config["UPLOAD_ACCEL_REDIRECT_PREFIX"] = os.getenv("UPLOAD_ACCEL_REDIRECT_PREFIX", "")
+    app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "false").lower() == "true"
+    # Production schemas, SQLite included, come from Alembic or ``create-schema``.
+    auto_create_default = app.debug or app.testing
+    app.config["AUTO_CREATE_SCHEMA"] = os.getenv(
+        "AUTO_CREATE_SCHEMA", str(auto_create_default)
+    ).lower() == "true"
 
     init_db(app)
+    init_replicas(app)
     jwt.init_app(app)
+    init_events(app)
+    init_compression(app)
+    init_metrics(app)
+    init_query_budget(app)
+    init_profiling(app)
+    init_slow_query_log(app)
 
     @app.route("/health")
     def healthcheck():
         return jsonify({"status": "ok"})
 
-    from .routes import auth, courses, instructor, lessons, payments, uploads
+    @app.route("/health/ready")
+    def readiness():
+        """Deep check: database round trip plus connection pool occupancy.
+
+        A saturated pool fails the probe at once instead of queueing the ping
+        behind ``DB_POOL_TIMEOUT``.
+        """
+        pool = pool_status()
+        if pool.get("saturated"):
+            database = {"error": "PoolSaturated", "pool": pool}
+            return jsonify({"status": "unavailable", "database": database}), 503
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as exc:
+            app.logger.warning("Readiness check failed: %s", exc)
+            database = {"error": type(exc).__name__, "pool": pool_status()}
+            return jsonify({"status": "unavailable", "database": database}), 503
+        ping_ms = round((time.perf_counter() - started) * 1000, 3)
+        return jsonify({"status": "ok", "database": {"ping_ms": ping_ms, "pool": pool_status()}})
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(courses.bp)
+    app.register_blueprint(diagnostics.bp)
     app.register_blueprint(instructor.bp)
     app.register_blueprint(lessons.bp)
     app.register_blueprint(payments.bp)
     app.register_blueprint(uploads.bp)
+    app.register_blueprint(uploads.files_bp)
 
-    with app.app_context():
+    @app.cli.command("create-schema")
+    def create_schema():
+        """Create any missing tables from the models (development only)."""
         db.create_all()
 
-    return app
-
+    # Development and test convenience; production schemas come from Alembic.
+    if app.config["AUTO_CREATE_SCHEMA"]:
+        with app.app_context():
+            db.create_all()
 
-app = create_app()
+    return app
@@ -0,0 +1,266 @@
+"""ASGI serving: native coroutines for long-lived I/O, the Flask app for the rest.
+
+:func:`create_asgi_app` wraps :func:`app.create_app` so that every blueprint
+is served unchanged through ``asgiref``'s WSGI adapter, with requests spread
+over a pool of ``ASGI_WSGI_THREADS`` threads. Endpoints that mostly wait are implemented here as
+coroutines instead, so thousands of them share one event loop without
+holding a thread each. The order status stream is the first of them.
+
+Database reads from coroutines use an async driver (``asyncpg`` or
+``aiosqlite``) when one is installed for the configured database, and
+otherwise fall back to a thread.
+
+Run with ``uvicorn asgi:app`` from ``backend/``. This needs the optional
+``asgiref`` and ``uvicorn`` packages.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib.util
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, json
+from flask_jwt_extended import decode_token
+from sqlalchemy import select
+
+from . import create_app
+from .db import apply_sqlite_pragmas, db, sqlite_pragmas
+from .models import PAYMENT_ORDER_STATUS_VALUES, PaymentOrder
+from .routes.payments import SSE_HEARTBEAT_SECONDS, SSE_MAX_STREAM_SECONDS, _order_channel, _sse
+from .services.events import broker
+
+try:  # Optional dependency; only needed for ASGI deployments.
+    from asgiref.sync import sync_to_async
+    from asgiref.wsgi import WsgiToAsgiInstance
+except ImportError:  # pragma: no cover - depends on deployment
+    WsgiToAsgiInstance = None
+
+try:  # Needs greenlet, which only some platforms ship with SQLAlchemy.
+    from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+except ImportError:  # pragma: no cover - depends on deployment
+    create_async_engine = None
+
+Handler = Callable[..., Awaitable[None]]
+ASYNC_DRIVERS = {
+    "postgresql": ("asyncpg", "postgresql+asyncpg"),
+    "sqlite": ("aiosqlite", "sqlite+aiosqlite"),
+}
+
+
+def async_database_url(url: str) -> Optional[str]:
+    """The async-driver form of ``url``, or ``None`` when no driver is installed."""
+    scheme, _, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    if driver is None or importlib.util.find_spec(driver[0]) is None:
+        return None
+    return f"{driver[1]}://{rest}"
+
+
+class ThreadedWsgi:
+    """ASGI adapter for a WSGI app that runs requests concurrently.
+
+    ``asgiref.wsgi.WsgiToAsgi`` runs the app through ``sync_to_async`` with
+    ``thread_sensitive=True``, so every request shares one thread and they
+    run one at a time. This reuses its request translation but runs each
+    request on a bounded pool of ``max_threads``, like gunicorn's threads.
+    """
+
+    def __init__(self, wsgi_app, max_threads: int):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="wsgi")
+        self._run = WsgiToAsgiInstance.run_wsgi_app.__wrapped__
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        instance = WsgiToAsgiInstance(self.wsgi_app)
+        instance.run_wsgi_app = sync_to_async(
+            functools.partial(self._run, instance), thread_sensitive=False, executor=self.executor
+        )
+        await instance(scope, receive, send)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class AsyncApp:
+    """ASGI application that routes some paths to coroutines and the rest to Flask."""
+
+    def __init__(
+        self,
+        flask_app: Flask,
+        async_engine: Optional["AsyncEngine"] = None,
+        wsgi_threads: int = 8,
+    ):
+        if WsgiToAsgiInstance is None:
+            raise RuntimeError("ASGI serving requires the 'asgiref' package to be installed")
+        self.flask_app = flask_app
+        self.async_engine = async_engine
+        self._wsgi = ThreadedWsgi(flask_app, wsgi_threads)
+        self._routes: List[Tuple[str, re.Pattern, Handler]] = [
+            (
+                "GET",
+                re.compile(r"^/api/payments/orders/(?P<provider_order_id>[^/]+)/events$"),
+                self.order_events,
+            ),
+        ]
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http":
+            for method, pattern, handler in self._routes:
+                match = pattern.match(scope["path"])
+                if match and scope["method"] == method:
+                    try:
+                        await handler(scope, receive, send, **match.groupdict())
+                    except HTTPError as exc:
+                        await self._json(send, exc.status, {"message": exc.message})
+                    return
+        await self._wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.async_engine is not None:
+                    await self.async_engine.dispose()
+                self._wsgi.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _json(send, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    def _identity(self, scope: Dict[str, Any]) -> Optional[str]:
+        """Like ``jwt_required(optional=True)``: no token is anonymous, a bad one is rejected."""
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if not authorization:
+            return None
+        scheme, _, token = authorization.partition(" ")
+        if scheme != "Bearer" or not token:
+            raise HTTPError(401, "Missing or malformed Authorization header")
+        with self.flask_app.app_context():
+            try:
+                claims = decode_token(token)
+            except Exception:
+                raise HTTPError(401, "Invalid or expired token")
+            return claims[self.flask_app.config["JWT_IDENTITY_CLAIM"]]
+
+    async def _order_status(self, provider_order_id: str) -> Optional[Tuple[int, str]]:
+        query = select(PaymentOrder.user_id, PaymentOrder.status).where(
+            PaymentOrder.provider_order_id == provider_order_id
+        )
+        if self.async_engine is not None:
+            async with self.async_engine.connect() as conn:
+                return (await conn.execute(query)).first()
+
+        def lookup():
+            with self.flask_app.app_context():
+                return db.session.execute(query).first()
+
+        return await asyncio.to_thread(lookup)
+
+    async def order_events(self, scope, receive, send, provider_order_id: str) -> None:
+        """Coroutine twin of ``payments.order_events``: same auth, same event stream."""
+        user_id = self._identity(scope)
+        # Subscribe before reading the current status so no update slips between.
+        subscription = broker.subscribe_async(_order_channel(provider_order_id))
+        with subscription:
+            row = await self._order_status(provider_order_id)
+            if row is None:
+                raise HTTPError(404, "Order not found")
+            owner_id, status = row
+            if user_id and owner_id != int(user_id):
+                raise HTTPError(403, "Forbidden")
+
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/event-stream; charset=utf-8"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no"),
+                    ],
+                }
+            )
+            initial = {"order_id": provider_order_id, "status": status}
+            await self._send_chunk(send, "retry: 3000\n" + _sse("status", initial))
+            if status == PAYMENT_ORDER_STATUS_VALUES[0]:
+                await self._stream_updates(receive, send, subscription)
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _stream_updates(self, receive, send, subscription) -> None:
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        try:
+            while time.monotonic() < deadline:
+                update = asyncio.ensure_future(subscription.get_async())
+                done, _ = await asyncio.wait(
+                    {update, disconnected},
+                    timeout=SSE_HEARTBEAT_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    update.cancel()
+                    return
+                if update not in done:
+                    update.cancel()
+                    await self._send_chunk(send, ": keep-alive\n\n")
+                    continue
+                message = update.result()
+                await self._send_chunk(send, _sse("status", message))
+                if message["status"] != PAYMENT_ORDER_STATUS_VALUES[0]:
+                    return
+        finally:
+            disconnected.cancel()
+
+    @staticmethod
+    async def _wait_disconnect(receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    @staticmethod
+    async def _send_chunk(send, text: str) -> None:
+        await send({"type": "http.response.body", "body": text.encode(), "more_body": True})
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None) -> AsyncApp:
+    """Build the ASGI app around ``flask_app`` (a fresh ``create_app()`` by default)."""
+    flask_app = flask_app or create_app()
+    flask_app.config.setdefault("ASGI_WSGI_THREADS", int(os.getenv("ASGI_WSGI_THREADS", "8")))
+    async_engine = None
+    with flask_app.app_context():
+        # The engine URL, not the config value: relative SQLite paths are resolved there.
+        url = async_database_url(db.engine.url.render_as_string(hide_password=False))
+    if url is not None and create_async_engine is not None:
+        options = {"pool_pre_ping": True} if not url.startswith("sqlite") else {}
+        async_engine = create_async_engine(url, **options)
+        if url.startswith("sqlite") and flask_app.config["SQLITE_PRAGMAS"]:
+            apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+    return AsyncApp(flask_app, async_engine, flask_app.config["ASGI_WSGI_THREADS"])
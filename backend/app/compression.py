@@ -0,0 +1,185 @@
+"""gzip/brotli response compression.
+
+The encoding is negotiated from ``Accept-Encoding``: brotli when the
+``brotli`` package is installed and the client accepts it, otherwise gzip.
+Buffered bodies smaller than ``COMPRESS_MIN_SIZE`` bytes go out as they are,
+because the framing overhead would outweigh the saving. Streamed responses
+(Server-Sent Events) are compressed chunk by chunk, and each chunk is flushed
+so that events are not held back.
+
+Successful ``GET`` responses get a content-hash ``ETag`` (``RESPONSE_ETAGS``),
+so clients that send ``If-None-Match`` receive ``304 Not Modified``. A
+compressed body is cached in an LRU keyed on its strong ETag and encoding, so
+a repeat of the same listing skips recompression. Compressed variants carry
+their own ETag (``"<etag>-gzip"``/``"<etag>-br"``), as HTTP requires for a
+different representation.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import current_app, request
+
+try:  # Optional: without it only gzip is offered.
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+from .services.cache import LRUCache
+
+COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+        "text/css",
+        "text/csv",
+        "text/event-stream",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "text/xml",
+    }
+)
+
+_compressed = LRUCache(maxsize=256)
+
+
+def _encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _negotiate() -> Optional[str]:
+    """Pick the encoding with the highest client preference; brotli wins ties."""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0.0
+    for encoding in _encodings():
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    config = current_app.config
+    if encoding == "br":
+        return brotli.compress(body, quality=config["COMPRESS_BROTLI_QUALITY"])
+    # ``mtime=0`` keeps the output byte-identical for identical input.
+    return gzip.compress(body, compresslevel=config["COMPRESS_GZIP_LEVEL"], mtime=0)
+
+
+def _compress_stream(chunks: Iterable[bytes], original, encoding: str) -> Iterator[bytes]:
+    # Set up here, not lazily: the body is iterated after the app context ends.
+    config = current_app.config
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESS_BROTLI_QUALITY"])
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(config["COMPRESS_GZIP_LEVEL"], zlib.DEFLATED, 31)
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+        finish = compressor.flush
+    return _stream(chunks, original, process, flush, finish)
+
+
+def _stream(chunks, original, process, flush, finish) -> Iterator[bytes]:
+    try:
+        for chunk in chunks:
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # Closing the wrapped iterable runs the view's cleanup (e.g. unsubscribing).
+        if hasattr(original, "close"):
+            original.close()
+
+
+def _eligible(response) -> bool:
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if "no-transform" in response.headers.get("Cache-Control", ""):
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _after_request(response):
+    if not _eligible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    config = current_app.config
+
+    if response.is_streamed:
+        encoding = _negotiate()
+        if encoding:
+            original = response.response
+            response.response = _compress_stream(response.iter_encoded(), original, encoding)
+            response.headers["Content-Encoding"] = encoding
+            response.headers.pop("Content-Length", None)
+        return response
+
+    if (
+        config["RESPONSE_ETAGS"]
+        and request.method in ("GET", "HEAD")
+        and response.status_code == 200
+        and "ETag" not in response.headers
+        and "no-store" not in response.headers.get("Cache-Control", "")
+    ):
+        response.add_etag()
+
+    body = response.get_data()
+    encoding = _negotiate() if len(body) >= config["COMPRESS_MIN_SIZE"] else None
+    etag, weak = response.get_etag()
+    if etag:
+        if encoding:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+    if not encoding:
+        return response
+
+    cacheable = etag and not weak and len(body) <= config["COMPRESS_CACHE_MAX_BYTES"]
+    compressed = _compressed.get((etag, encoding)) if cacheable else None
+    if compressed is None:
+        compressed = _compress(body, encoding)
+        if cacheable:
+            _compressed.set((etag, encoding), compressed)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app) -> None:
+    """Compress eligible responses unless ``COMPRESS_ENABLED`` is false.
+
+    Register this before other ``after_request`` hooks: Flask runs them in
+    reverse order, so compression then sees the final headers and body.
+    """
+    app.config.setdefault(
+        "COMPRESS_ENABLED", os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    )
+    app.config.setdefault("COMPRESS_MIN_SIZE", int(os.getenv("COMPRESS_MIN_SIZE", "1024")))
+    app.config.setdefault("COMPRESS_GZIP_LEVEL", int(os.getenv("COMPRESS_GZIP_LEVEL", "6")))
+    app.config.setdefault(
+        "COMPRESS_BROTLI_QUALITY", int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+    )
+    app.config.setdefault("COMPRESS_CACHE_SIZE", int(os.getenv("COMPRESS_CACHE_SIZE", "256")))
+    app.config.setdefault(
+        "COMPRESS_CACHE_MAX_BYTES", int(os.getenv("COMPRESS_CACHE_MAX_BYTES", str(1024 * 1024)))
+    )
+    app.config.setdefault(
+        "RESPONSE_ETAGS", os.getenv("RESPONSE_ETAGS", "true").lower() == "true"
+    )
+    if not app.config["COMPRESS_ENABLED"]:
+        return
+
+    _compressed.maxsize = app.config["COMPRESS_CACHE_SIZE"]
+    app.after_request(_after_request)
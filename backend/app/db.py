@@ -1,9 +1,145 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from .replicas import RoutingSession
 
 # Shared SQLAlchemy instance for the application.
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def engine_options(database_uri: str) -> Dict[str, Any]:
+    """Pool settings from ``DB_POOL_*`` environment variables.
+
+    Size the pool to the threads of one worker: every worker process has its
+    own pool, so the server can open ``workers * (size + overflow)``
+    connections in total.
+    """
+    options: Dict[str, Any] = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    if not database_uri.startswith("sqlite"):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+    return options
+
+
+def pool_status() -> Dict[str, Any]:
+    """Occupancy and checkout wait statistics of the primary engine's pool."""
+    pool = db.engine.pool
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+            # Every connection is in use, so the next checkout would wait.
+            saturated=pool._max_overflow >= 0
+            and pool.checkedout() >= pool.size() + pool._max_overflow,
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            status.update(
+                checkouts=pool.checkouts,
+                checkout_timeouts=pool.timeouts,
+                wait_mean_ms=round(pool.wait_total / pool.checkouts * 1000, 3)
+                if pool.checkouts
+                else 0.0,
+                wait_max_ms=round(pool.wait_max * 1000, 3),
+            )
+    return status
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """PRAGMAs run on every new SQLite connection, from ``SQLITE_*`` variables.
+
+    WAL lets readers proceed while one writer commits, and ``synchronous=NORMAL``
+    is durable under WAL except against power loss (the last commits can be
+    lost, but the file cannot be corrupted). ``busy_timeout`` makes a writer
+    wait for the lock instead of failing with "database is locked".
+    """
+    foreign_keys = os.getenv("SQLITE_FOREIGN_KEYS", "true").lower() == "true"
+    return {
+        # First, so that switching the journal mode also waits for the lock.
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "foreign_keys": "ON" if foreign_keys else "OFF",
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative values are KiB rather than pages: 64 MiB per connection.
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024))),
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas: Dict[str, Any]) -> None:
+    """Run ``pragmas`` on each connection ``engine`` opens."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
 
 
 def init_db(app) -> None:
-    """Initialize the database extension with the given Flask app."""
+    """Initialize the database extension with the given Flask app.
+
+    SQLite engines get the :func:`sqlite_pragmas` profile unless
+    ``SQLITE_PRAGMAS`` is false.
+    """
     db.init_app(app)
+    app.config.setdefault(
+        "SQLITE_PRAGMAS", os.getenv("SQLITE_PRAGMAS", "true").lower() == "true"
+    )
+    if not app.config["SQLITE_PRAGMAS"]:
+        return
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if engine.dialect.name == "sqlite"]
+    if engines:
+        pragmas = sqlite_pragmas()
+        for engine in engines:
+            apply_sqlite_pragmas(engine, pragmas)
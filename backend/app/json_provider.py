@@ -0,0 +1,66 @@
+"""Flask JSON provider backed by orjson.
+
+``datetime``/``date``/``time`` are written as ISO 8601 strings, and
+dataclasses and UUIDs are handled natively by orjson. ``Decimal`` is written
+as a JSON number, which is how the API already returned prices.
+"""
+
+from __future__ import annotations
+
+import decimal
+from typing import Any, Callable, Optional
+
+import orjson
+from flask.json.provider import JSONProvider
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    sort_keys = True
+    """Match Flask's default key order so responses (and their ETags) stay stable."""
+
+    compact: Optional[bool] = None
+    """As in Flask's provider: indented in debug mode unless set to ``True``."""
+
+    mimetype = "application/json"
+
+    def _options(self, indent: bool, sort_keys: Optional[bool]) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(
+        self,
+        obj: Any,
+        *,
+        default: Optional[Callable[[Any], Any]] = None,
+        indent: Any = None,
+        sort_keys: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> bytes:
+        # ``separators``, ``ensure_ascii`` and other ``json.dumps`` options have
+        # no orjson equivalent; output is always compact UTF-8.
+        options = self._options(bool(indent), sort_keys)
+        return orjson.dumps(obj, default=default or _default, option=options)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = self.dumps_bytes(obj, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,136 @@
+"""Prometheus request and database instrumentation.
+
+Every request is timed per endpoint (``request.endpoint``, so label values
+stay bounded), and SQL statements are counted and timed through SQLAlchemy
+cursor events. ``/metrics`` serves the Prometheus text format.
+
+Under a pre-fork server, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty,
+writable directory before the workers start; each worker then writes its
+samples there and ``/metrics`` aggregates all of them.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from .db import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by endpoint.",
+    ("method", "endpoint"),
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Requests by endpoint and status code.",
+    ("method", "endpoint", "status"),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled.",
+    ("method", "endpoint"),
+    multiprocess_mode="livesum",
+)
+DB_QUERY_COUNT = Counter(
+    "db_queries_total",
+    "SQL statements executed, by originating endpoint.",
+    ("endpoint",),
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency, by originating endpoint.",
+    ("endpoint",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+def _endpoint_label() -> str:
+    if not has_request_context():
+        return "none"
+    return request.endpoint or "unmatched"
+
+
+def _before_request() -> None:
+    g._metrics = (time.perf_counter(), request.method, _endpoint_label())
+    REQUESTS_IN_PROGRESS.labels(request.method, g._metrics[2]).inc()
+
+
+def _record(status: int) -> None:
+    started, method, endpoint = g.pop("_metrics")
+    REQUEST_LATENCY.labels(method, endpoint).observe(time.perf_counter() - started)
+    REQUEST_COUNT.labels(method, endpoint, str(status)).inc()
+    REQUESTS_IN_PROGRESS.labels(method, endpoint).dec()
+
+
+def _after_request(response):
+    if "_metrics" in g:
+        _record(response.status_code)
+    return response
+
+
+def _teardown_request(exc) -> None:
+    # Only reached with metrics still pending when the view raised.
+    if "_metrics" in g:
+        _record(500)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement context: a failed statement never reaches the
+    # after hook, so a per-connection stack would pair later queries with
+    # stale start times.
+    context._metrics_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._metrics_query_start
+    endpoint = _endpoint_label()
+    DB_QUERY_COUNT.labels(endpoint).inc()
+    DB_QUERY_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        provided = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(provided, token):
+            return Response("Forbidden\n", status=403, mimetype="text/plain")
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app) -> None:
+    """Instrument ``app`` and its database engine, and expose ``/metrics``."""
+    app.config.setdefault("METRICS_TOKEN", os.getenv("METRICS_TOKEN", ""))
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -56,7 +56,9 @@ class User(db.Model):
         "Course", back_populates="instructor", cascade="all, delete-orphan"
     )
     enrollments = db.relationship("Enrollment", back_populates="user")
-    payments = db.relationship("Payment", back_populates="user")
+    payments = db.relationship(
+        "Payment", back_populates="user", foreign_keys="Payment.user_id"
+    )
 
     def __repr__(self) -> str:
         return f"<User {self.email}>"
@@ -146,7 +148,7 @@ class Payment(db.Model):
     order_id = db.Column(db.Integer, db.ForeignKey("payment_orders.id"), nullable=True)
     recorded_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
 
-    user = db.relationship("User", back_populates="payments")
+    user = db.relationship("User", back_populates="payments", foreign_keys=[user_id])
     course = db.relationship("Course", back_populates="payments")
     order = db.relationship("PaymentOrder", back_populates="payments")
     recorded_by = db.relationship("User", foreign_keys=[recorded_by_user_id])
@@ -190,9 +192,7 @@ class Lesson(db.Model):
     )
 
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(
-        db.Integer, db.ForeignKey("courses.id"), nullable=False, index=True
-    )
+    course_id = db.Column(db.Integer, db.ForeignKey("courses.id"), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     video_url = db.Column(db.String(1024), nullable=True)
@@ -222,9 +222,7 @@ class VideoClip(db.Model):
     )
 
     id = db.Column(db.Integer, primary_key=True)
-    lesson_id = db.Column(
-        db.Integer, db.ForeignKey("lessons.id"), nullable=False, index=True
-    )
+    lesson_id = db.Column(db.Integer, db.ForeignKey("lessons.id"), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     start_seconds = db.Column(db.Integer, nullable=False, default=0)
     end_seconds = db.Column(db.Integer, nullable=True)
@@ -263,6 +261,18 @@ class Attachment(db.Model):
     __table_args__ = (
         Index("ix_attachments_created_by", "created_by_user_id"),
         Index("ix_attachments_storage_provider", "storage_provider"),
+        # Keyset pagination of the media library, per owner and per owner + type.
+        Index("ix_attachments_owner_created", "created_by_user_id", "created_at", "id"),
+        Index(
+            "ix_attachments_owner_type_created",
+            "created_by_user_id",
+            "content_type",
+            "created_at",
+            "id",
+        ),
+        Index("ix_attachments_created", "created_at", "id"),
+        # One attachment per signed upload, so a completion can't be replayed.
+        UniqueConstraint("upload_key", name="uq_attachments_upload_key"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -274,7 +284,63 @@ class Attachment(db.Model):
     created_by_user_id = db.Column(
         db.Integer, db.ForeignKey("users.id"), nullable=True, index=True
     )
+    blob_id = db.Column(db.Integer, db.ForeignKey("blobs.id"), nullable=True, index=True)
+    upload_key = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    blob = db.relationship("Blob")
+
     def __repr__(self) -> str:
         return f"<Attachment {self.filename} storage={self.storage_provider}>"
+
+
+class Blob(db.Model):
+    """Stored file content shared by every attachment with the same SHA-256."""
+
+    __tablename__ = "blobs"
+    __table_args__ = (
+        UniqueConstraint("sha256", name="uq_blobs_sha256"),
+        Index("ix_blobs_ref_count", "ref_count"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    storage_key = db.Column(db.String(255), nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Blob {self.sha256[:12]} refs={self.ref_count}>"
+
+
+class StorageUsage(db.Model):
+    """Running per-user totals over ``attachments``, kept by ``services.quota``."""
+
+    __tablename__ = "storage_usage"
+    __table_args__ = (Index("ix_storage_usage_bytes_used", "bytes_used"),)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    bytes_used = db.Column(db.BigInteger, nullable=False, default=0)
+    attachment_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<StorageUsage user={self.user_id} bytes={self.bytes_used}>"
+
+
+class WebhookEvent(db.Model):
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        UniqueConstraint("event_key", name="uq_webhook_events_event_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_key = db.Column(db.String(255), nullable=False)
+    provider_order_id = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<WebhookEvent {self.event_key}>"
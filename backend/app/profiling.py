@@ -0,0 +1,95 @@
+"""Opt-in cProfile sampling of live requests.
+
+A request is profiled when it falls in the ``PROFILE_SAMPLE_RATE`` sample,
+or when it carries ``X-Profile: 1`` with an admin token and
+``PROFILE_ALLOW_HEADER`` is on. Each profile is written to ``PROFILE_DIR`` as
+``<timestamp>_<endpoint>_<duration>ms.pstats``; only the newest
+``PROFILE_KEEP`` files are kept. Load them with ``python -m pstats``, or turn
+them into flame graphs with snakeviz or flameprof.
+
+With neither option set no hooks are installed, so profiling costs nothing.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+# One profile at a time per process: profilers are not re-entrant across
+# threads (and on Python 3.12+ only one may be active at all).
+_active = threading.Lock()
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _requested_by_admin() -> bool:
+    if request.headers.get("X-Profile") != "1":
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+    return "admin" in get_jwt().get("roles", [])
+
+
+def _before_request() -> None:
+    config = current_app.config
+    wanted = random.random() < config["PROFILE_SAMPLE_RATE"] or (
+        config["PROFILE_ALLOW_HEADER"] and _requested_by_admin()
+    )
+    if not wanted or not _active.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    g._profile = (profiler, time.perf_counter())
+    profiler.enable()
+
+
+def _rotate(directory: Path, keep: int) -> None:
+    profiles = sorted(directory.glob("*.pstats"), key=lambda path: path.stat().st_mtime)
+    for stale in profiles[:-keep] if keep > 0 else profiles:
+        stale.unlink(missing_ok=True)
+
+
+def _teardown_request(exc) -> None:
+    state = g.pop("_profile", None)
+    if state is None:
+        return
+    profiler, started = state
+    try:
+        profiler.disable()
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        endpoint = _UNSAFE_CHARS_RE.sub("_", request.endpoint or "unmatched")
+        directory = Path(current_app.config["PROFILE_DIR"])
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        name = f"{stamp}_{os.getpid()}_{endpoint}_{duration_ms}ms.pstats"
+        profiler.dump_stats(directory / name)
+        _rotate(directory, current_app.config["PROFILE_KEEP"])
+    except OSError:
+        current_app.logger.exception("Could not write request profile")
+    finally:
+        _active.release()
+
+
+def init_profiling(app) -> None:
+    """Install the profiling hooks when sampling or the admin header is enabled."""
+    app.config.setdefault("PROFILE_SAMPLE_RATE", float(os.getenv("PROFILE_SAMPLE_RATE", "0")))
+    app.config.setdefault(
+        "PROFILE_ALLOW_HEADER", os.getenv("PROFILE_ALLOW_HEADER", "false").lower() == "true"
+    )
+    app.config.setdefault(
+        "PROFILE_DIR", os.getenv("PROFILE_DIR", str(Path(app.instance_path) / "profiles"))
+    )
+    app.config.setdefault("PROFILE_KEEP", int(os.getenv("PROFILE_KEEP", "200")))
+
+    if app.config["PROFILE_SAMPLE_RATE"] <= 0 and not app.config["PROFILE_ALLOW_HEADER"]:
+        return
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,104 @@
+"""Per-request SQL query budgets and N+1 detection for debug and test runs.
+
+With ``QUERY_BUDGET_MODE`` set to ``warn`` or ``raise``, every statement a
+request executes is counted. A request fails its check when it runs more
+statements than its view's budget (``@query_budget(n)``, otherwise
+``QUERY_BUDGET_DEFAULT``) or repeats one statement ``QUERY_REPEAT_THRESHOLD``
+times or more, which is the signature of a lazy load inside a loop. ``warn``
+logs the failure; ``raise`` raises :class:`QueryBudgetExceeded` so the test
+that made the request fails. The default, ``off``, installs nothing.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import Counter
+from typing import Callable, List, Optional
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .db import db
+
+MODES = ("off", "warn", "raise")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in ``raise`` mode when a request breaks its query budget."""
+
+
+def query_budget(limit: int) -> Callable:
+    """Declare the most SQL statements a view may execute per request."""
+
+    def decorator(fn: Callable) -> Callable:
+        fn.query_budget = limit
+        return fn
+
+    return decorator
+
+
+def _view_budget() -> Optional[int]:
+    view = current_app.view_functions.get(request.endpoint or "")
+    return getattr(view, "query_budget", None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "_query_log" in g:
+        g._query_log[statement] += 1
+
+
+def _before_request() -> None:
+    g._query_log = Counter()
+
+
+def _problems(log: Counter, budget: int, repeat_threshold: int) -> List[str]:
+    problems = []
+    total = sum(log.values())
+    if total > budget:
+        problems.append(f"{total} queries, budget is {budget}")
+    for statement, count in log.most_common():
+        if count < repeat_threshold:
+            break
+        problems.append(f"possible N+1, ran {count}x: {' '.join(statement.split())[:200]}")
+    return problems
+
+
+def _after_request(response):
+    log = g.pop("_query_log", None)
+    if log is None:
+        return response
+    response.headers["X-Query-Count"] = str(sum(log.values()))
+
+    config = current_app.config
+    budget = _view_budget()
+    if budget is None:
+        budget = config["QUERY_BUDGET_DEFAULT"]
+    problems = _problems(log, budget, config["QUERY_REPEAT_THRESHOLD"])
+    if not problems:
+        return response
+
+    message = f"{request.method} {request.endpoint}: " + "; ".join(problems)
+    if config["QUERY_BUDGET_MODE"] == "raise":
+        raise QueryBudgetExceeded(message)
+    current_app.logger.warning("Query budget exceeded: %s", message)
+    return response
+
+
+def init_query_budget(app) -> None:
+    """Count queries per request when ``QUERY_BUDGET_MODE`` is ``warn`` or ``raise``."""
+    app.config.setdefault("QUERY_BUDGET_MODE", os.getenv("QUERY_BUDGET_MODE", "off").lower())
+    app.config.setdefault("QUERY_BUDGET_DEFAULT", int(os.getenv("QUERY_BUDGET_DEFAULT", "20")))
+    app.config.setdefault("QUERY_REPEAT_THRESHOLD", int(os.getenv("QUERY_REPEAT_THRESHOLD", "3")))
+
+    mode = app.config["QUERY_BUDGET_MODE"]
+    if mode not in MODES:
+        raise ValueError(f"QUERY_BUDGET_MODE must be one of {', '.join(MODES)}")
+    if mode == "off":
+        return
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,113 @@
+"""Read-replica routing for read-only endpoints.
+
+Replicas come from ``DATABASE_REPLICA_URLS`` (comma separated) and are
+registered as ``replica_<n>`` binds. Only views marked with
+:func:`use_replica` read from them, and only when the caller has not written
+in the last ``READ_YOUR_WRITES_SECONDS``. That window is tracked per user
+in this process, plus a ``primary_until`` cookie so it holds across workers.
+Everything else, including any statement flushed by the ORM, goes to the
+primary.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy.session import Session
+
+from .services.cache import LRUCache
+
+REPLICA_BIND_PREFIX = "replica_"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+PRIMARY_COOKIE = "primary_until"
+
+_recent_writers = LRUCache(maxsize=int(os.getenv("READ_YOUR_WRITES_CACHE_SIZE", "10000")))
+
+
+class RoutingSession(Session):
+    """Sends reads of replica-enabled requests to the request's chosen replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get("_db_replica")
+            if replica is not None and getattr(clause, "is_select", False):
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica(fn: Callable) -> Callable:
+    """Allow a read-only view to be served from a read replica."""
+    fn.use_replica = True
+    return fn
+
+
+def replica_binds(options_for: Callable[[str], Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """``SQLALCHEMY_BINDS`` entries for the replicas in ``DATABASE_REPLICA_URLS``."""
+    urls = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    return {
+        f"{REPLICA_BIND_PREFIX}{index}": {"url": url, **options_for(url)}
+        for index, url in enumerate(urls)
+    }
+
+
+def _current_user_id() -> Optional[str]:
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return None
+    return get_jwt_identity()
+
+
+def _wrote_recently(user_id: Optional[str]) -> bool:
+    now = time.time()
+    try:
+        if float(request.cookies.get(PRIMARY_COOKIE, 0)) > now:
+            return True
+    except ValueError:
+        pass
+    return user_id is not None and _recent_writers.get(user_id, 0) > now
+
+
+def _choose_bind(replicas: List[str]) -> None:
+    view = current_app.view_functions.get(request.endpoint or "")
+    if not getattr(view, "use_replica", False) or request.method in WRITE_METHODS:
+        return
+    if _wrote_recently(_current_user_id()):
+        return
+    g._db_replica = random.choice(replicas)
+
+
+def _remember_write(response):
+    if request.method not in WRITE_METHODS or response.status_code >= 400:
+        return response
+    until = time.time() + current_app.config["READ_YOUR_WRITES_SECONDS"]
+    user_id = _current_user_id()
+    if user_id is not None:
+        _recent_writers.set(user_id, until)
+    response.set_cookie(
+        PRIMARY_COOKIE,
+        str(int(until) + 1),
+        max_age=int(current_app.config["READ_YOUR_WRITES_SECONDS"]) + 1,
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
+
+
+def init_replicas(app) -> None:
+    """Install routing hooks when replica binds are configured."""
+    app.config.setdefault(
+        "READ_YOUR_WRITES_SECONDS", float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    )
+    replicas = [
+        key for key in app.config.get("SQLALCHEMY_BINDS", {}) if key.startswith(REPLICA_BIND_PREFIX)
+    ]
+    if not replicas:
+        return
+    app.before_request(lambda: _choose_bind(replicas))
+    app.after_request(_remember_write)
@@ -1,15 +1,19 @@
 from .auth import bp as auth_bp
 from .courses import bp as courses_bp
+from .diagnostics import bp as diagnostics_bp
 from .instructor import bp as instructor_bp
 from .lessons import bp as lessons_bp
 from .payments import bp as payments_bp
 from .uploads import bp as uploads_bp
+from .uploads import files_bp
 
 __all__ = [
     "auth_bp",
     "courses_bp",
+    "diagnostics_bp",
     "instructor_bp",
     "lessons_bp",
     "payments_bp",
     "uploads_bp",
+    "files_bp",
 ]
@@ -3,33 +3,30 @@ from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
 
 from ..db import db
 from ..models import Course, Enrollment, Lesson
+from ..query_budget import query_budget
+from ..replicas import use_replica
 from ..security import ValidationError, require_json, sanitize_string, validate_decimal
+from ..serializers import COURSE_SUMMARY_FIELDS, course_schema
 from .auth import require_roles
 
 bp = Blueprint("courses", __name__, url_prefix="/api/courses")
 
 
-def _serialize_course(course: Course) -> dict:
-    return {
-        "id": course.id,
-        "slug": course.slug,
-        "title": course.title,
-        "description": course.description,
-        "price": float(course.price),
-    }
-
-
 @bp.route("/", methods=["GET"])
+@query_budget(1)
+@use_replica
 def list_courses():
-    courses = Course.query.order_by(Course.created_at.desc()).all()
-    return jsonify(
-        {
-            "courses": [
-                {"id": course.id, "title": course.title, "slug": course.slug}
-                for course in courses
-            ]
-        }
+    try:
+        fields = course_schema.requested_fields(COURSE_SUMMARY_FIELDS)
+    except ValidationError as exc:
+        return exc.to_response()
+
+    courses = (
+        Course.query.options(course_schema.load_only(fields))
+        .order_by(Course.created_at.desc())
+        .all()
     )
+    return jsonify({"courses": course_schema.dump_many(courses, fields)})
 
 
 @bp.route("/", methods=["POST"])
@@ -51,29 +48,44 @@ def create_course():
         )
         db.session.add(course)
         db.session.commit()
-        return jsonify({"course": _serialize_course(course)}), 201
+        return jsonify({"course": course_schema.dump(course)}), 201
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
 
 @bp.route("/<int:course_id>", methods=["GET"])
+@query_budget(1)
+@use_replica
 def get_course(course_id: int):
-    course = Course.query.get(course_id)
+    try:
+        fields = course_schema.requested_fields()
+    except ValidationError as exc:
+        return exc.to_response()
+
+    course = Course.query.options(course_schema.load_only(fields)).get(course_id)
     if not course:
         return jsonify({"message": "Course not found"}), 404
 
-    return jsonify(_serialize_course(course))
+    return jsonify(course_schema.dump(course, fields))
 
 
 @bp.route("/slug/<string:slug>", methods=["GET"])
+@query_budget(2)
+@use_replica
 def get_course_by_slug(slug: str):
-    course = Course.query.filter_by(slug=slug).first()
+    try:
+        fields = course_schema.requested_fields()
+    except ValidationError as exc:
+        return exc.to_response()
+
+    query = Course.query.options(course_schema.load_only(fields))
+    course = query.filter_by(slug=slug).first()
     if not course and slug.isdigit():
-        course = Course.query.get(int(slug))
+        course = query.get(int(slug))
     if not course:
         return jsonify({"message": "Course not found"}), 404
 
-    return jsonify(_serialize_course(course))
+    return jsonify(course_schema.dump(course, fields))
 
 
 @bp.route("/<int:course_id>", methods=["PUT"])
@@ -102,7 +114,7 @@ def update_course(course_id: int):
             course.price = validate_decimal(payload.get("price"), "price", min_value=0)
 
         db.session.commit()
-        return jsonify(_serialize_course(course))
+        return jsonify(course_schema.dump(course))
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -131,6 +143,8 @@ def _allowed_lessons(course_id: int, enrolled: bool) -> list[int]:
 
 
 @bp.route("/<int:course_id>/access", methods=["GET"])
+@query_budget(3)
+@use_replica
 @jwt_required(optional=True)
 def course_access(course_id: int):
     course = Course.query.get(course_id)
@@ -0,0 +1,35 @@
+import os
+
+from flask import Blueprint, current_app, jsonify, request
+
+from .. import slow_queries
+from .auth import require_roles
+
+bp = Blueprint("diagnostics", __name__, url_prefix="/api/diagnostics")
+
+SORT_KEYS = ("total_ms", "max_ms", "count")
+
+
+@bp.route("/slow-queries", methods=["GET"])
+@require_roles("admin")
+def list_slow_queries():
+    """Top slow statements seen by the worker that answers, grouped by fingerprint."""
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+    order_by = request.args.get("order_by", "total_ms")
+    if order_by not in SORT_KEYS:
+        return jsonify({"message": "Invalid order_by", "allowed": SORT_KEYS}), 400
+
+    return jsonify(
+        {
+            "pid": os.getpid(),
+            "threshold_ms": current_app.config["SLOW_QUERY_THRESHOLD_MS"],
+            "statements": slow_queries.top_statements(limit, order_by),
+        }
+    )
+
+
+@bp.route("/slow-queries", methods=["DELETE"])
+@require_roles("admin")
+def reset_slow_queries():
+    slow_queries.reset()
+    return jsonify({"message": "Slow query statistics cleared"})
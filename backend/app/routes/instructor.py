@@ -5,60 +5,38 @@ from flask_jwt_extended import get_jwt_identity
 
 from ..db import db
 from ..models import Classwork, Course, Lesson
+from ..query_budget import query_budget
+from ..replicas import use_replica
 from ..security import ValidationError, require_json, sanitize_string, validate_decimal
+from ..serializers import classwork_schema, course_schema, lesson_schema
 from .auth import require_roles
 
 bp = Blueprint("instructor", __name__, url_prefix="/api/instructor")
 
 
-def _serialize_course(course: Course) -> dict:
-    return {
-        "id": course.id,
-        "title": course.title,
-        "slug": course.slug,
-        "price": float(course.price),
-        "description": course.description,
-    }
-
-
-def _serialize_lesson(lesson: Lesson) -> dict:
-    return {
-        "id": lesson.id,
-        "title": lesson.title,
-        "description": lesson.description,
-        "video_url": lesson.video_url,
-        "colab_notebook_url": lesson.colab_notebook_url,
-        "notes_content": lesson.notes_content,
-        "order_index": lesson.order_index,
-        "is_free_preview": lesson.is_free_preview,
-    }
-
-
-def _serialize_classwork(item: Classwork) -> dict:
-    return {
-        "id": item.id,
-        "title": item.title,
-        "description": item.description,
-        "due_at": item.due_at.isoformat() if item.due_at else None,
-        "course_id": item.course_id,
-    }
-
-
 def _course_for_instructor(course_id: int) -> Course | None:
     user_id = get_jwt_identity()
     return Course.query.filter_by(id=course_id, instructor_id=user_id).first()
 
 
 @bp.route("/courses", methods=["GET"])
+@query_budget(1)
+@use_replica
 @require_roles("instructor", "teacher", "admin")
 def my_courses():
+    try:
+        fields = course_schema.requested_fields()
+    except ValidationError as exc:
+        return exc.to_response()
+
     user_id = get_jwt_identity()
     courses = (
-        Course.query.filter_by(instructor_id=user_id)
+        Course.query.options(course_schema.load_only(fields))
+        .filter_by(instructor_id=user_id)
         .order_by(Course.created_at.desc())
         .all()
     )
-    return jsonify({"courses": [_serialize_course(course) for course in courses]})
+    return jsonify({"courses": course_schema.dump_many(courses, fields)})
 
 
 @bp.route("/courses", methods=["POST"])
@@ -81,7 +59,7 @@ def create_course():
         db.session.add(course)
         db.session.commit()
 
-        return jsonify({"course": _serialize_course(course)}), 201
+        return jsonify({"course": course_schema.dump(course)}), 201
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -108,7 +86,7 @@ def update_course(course_id: int):
             course.price = validate_decimal(payload.get("price"), "price", min_value=0)
 
         db.session.commit()
-        return jsonify({"course": _serialize_course(course)})
+        return jsonify({"course": course_schema.dump(course)})
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -160,7 +138,7 @@ def create_lesson(course_id: int):
         db.session.add(lesson)
         db.session.commit()
 
-        return jsonify({"lesson": _serialize_lesson(lesson)}), 201
+        return jsonify({"lesson": lesson_schema.dump(lesson)}), 201
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -210,7 +188,7 @@ def update_lesson(course_id: int, lesson_id: int):
             lesson.is_free_preview = bool(payload["is_free_preview"])
 
         db.session.commit()
-        return jsonify({"lesson": _serialize_lesson(lesson)})
+        return jsonify({"lesson": lesson_schema.dump(lesson)})
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -257,7 +235,7 @@ def create_classwork(course_id: int):
         db.session.add(classwork)
         db.session.commit()
 
-        return jsonify({"classwork": _serialize_classwork(classwork)}), 201
+        return jsonify({"classwork": classwork_schema.dump(classwork)}), 201
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -295,7 +273,7 @@ def update_classwork(course_id: int, classwork_id: int):
             classwork.due_at = parsed_due_at
 
         db.session.commit()
-        return jsonify({"classwork": _serialize_classwork(classwork)})
+        return jsonify({"classwork": classwork_schema.dump(classwork)})
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
 
@@ -2,6 +2,10 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from ..models import Enrollment, Lesson, VideoClip
+from ..query_budget import query_budget
+from ..replicas import use_replica
+from ..security import ValidationError
+from ..serializers import clip_schema
 
 bp = Blueprint("lessons", __name__, url_prefix="/api/lessons")
 
@@ -15,18 +19,9 @@ def _is_enrolled(user_id: int | None, course_id: int) -> bool:
     return enrollment is not None
 
 
-def _serialize_clip(clip: VideoClip) -> dict:
-    return {
-        "id": clip.id,
-        "title": clip.title,
-        "start_seconds": clip.start_seconds,
-        "end_seconds": clip.end_seconds,
-        "notes": clip.notes,
-        "order_index": clip.order_index,
-    }
-
-
 @bp.route("/<int:lesson_id>/clips", methods=["GET"])
+@query_budget(3)
+@use_replica
 @jwt_required(optional=True)
 def get_video_clips(lesson_id: int):
     lesson = Lesson.query.get(lesson_id)
@@ -37,9 +32,15 @@ def get_video_clips(lesson_id: int):
     if not (lesson.is_free_preview or _is_enrolled(user_id, lesson.course_id)):
         return jsonify({"message": "Access denied"}), 403
 
+    try:
+        fields = clip_schema.requested_fields()
+    except ValidationError as exc:
+        return exc.to_response()
+
     clips = (
-        VideoClip.query.filter_by(lesson_id=lesson.id)
+        VideoClip.query.options(clip_schema.load_only(fields))
+        .filter_by(lesson_id=lesson.id)
         .order_by(VideoClip.order_index.asc())
         .all()
     )
-    return jsonify({"clips": [_serialize_clip(clip) for clip in clips]})
+    return jsonify({"clips": clip_schema.dump_many(clips, fields)})
@@ -1,11 +1,18 @@
+import csv
+import io
+import json
 import os
+import time
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash
 
 from ..db import db
@@ -27,50 +34,15 @@ from ..security import (
     sanitize_string,
     validate_decimal,
 )
+from ..serializers import enrollment_schema, order_schema, payment_schema
+from ..services.events import broker
 from ..services.payments import is_valid_signature
+from ..services.razorpay_client import ProviderError, get_client
+from ..services.webhooks import event_key, is_duplicate, mark_processed
 
 bp = Blueprint("payments", __name__, url_prefix="/api/payments")
 
 
-def _serialize_enrollment(enrollment: Enrollment) -> Dict:
-    return {
-        "id": enrollment.id,
-        "user_id": enrollment.user_id,
-        "course_id": enrollment.course_id,
-        "status": enrollment.status,
-        "enrolled_at": enrollment.enrolled_at.isoformat(),
-    }
-
-
-def _serialize_order(order: PaymentOrder) -> Dict:
-    return {
-        "id": order.id,
-        "order_id": order.provider_order_id,
-        "user_id": order.user_id,
-        "course_id": order.course_id,
-        "amount": float(order.amount),
-        "currency": order.currency,
-        "status": order.status,
-        "created_at": order.created_at.isoformat(),
-    }
-
-
-def _serialize_payment(payment: Payment) -> Dict:
-    return {
-        "id": payment.id,
-        "user_id": payment.user_id,
-        "course_id": payment.course_id,
-        "amount": float(payment.amount),
-        "status": payment.status,
-        "provider_payment_id": payment.provider_payment_id,
-        "order_id": payment.order_id,
-        "method": payment.method,
-        "notes": payment.notes,
-        "recorded_by_user_id": payment.recorded_by_user_id,
-        "created_at": payment.created_at.isoformat(),
-    }
-
-
 def _ensure_enrollment(user_id: int, course_id: int) -> Enrollment:
     enrollment = Enrollment.query.filter_by(
         user_id=user_id, course_id=course_id
@@ -102,13 +74,64 @@ def _get_latest_payment(order: PaymentOrder) -> Optional[Payment]:
     )
 
 
-def _mark_payment_failed(order: PaymentOrder, payment_id: Optional[str]) -> None:
+def _order_channel(provider_order_id: str) -> str:
+    return f"payment-order:{provider_order_id}"
+
+
+def _publish_order_status(order: PaymentOrder) -> None:
+    broker.publish(
+        _order_channel(order.provider_order_id),
+        {"order_id": order.provider_order_id, "status": order.status},
+    )
+
+
+def _lock_order(order: PaymentOrder) -> PaymentOrder:
+    """Re-read ``order`` holding its row lock until the transaction ends."""
+    if db.session.get_bind().dialect.name == "sqlite":
+        # SQLite has no row locks; a no-op UPDATE takes the database write lock.
+        db.session.execute(
+            update(PaymentOrder)
+            .where(PaymentOrder.id == order.id)
+            .values(status=PaymentOrder.status)
+        )
+    return (
+        PaymentOrder.query.filter_by(id=order.id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+
+
+def _already_paid_response(order: PaymentOrder, message: str):
+    enrollment = _ensure_enrollment(order.user_id, order.course_id)
+    payment = _get_latest_payment(order)
+    if db.session.new:
+        db.session.commit()
+    return (
+        jsonify(
+            {
+                "message": message,
+                "order": order_schema.dump(order),
+                "payment": payment_schema.dump(payment) if payment else None,
+                "enrollment": enrollment_schema.dump(enrollment),
+            }
+        ),
+        200,
+    )
+
+
+def _mark_payment_failed(order: PaymentOrder, payment_id: Optional[str]) -> PaymentOrder:
+    """Fail ``order`` under its row lock, unless a valid completion got there first."""
+    order = _lock_order(order)
+    if order.status != PAYMENT_ORDER_STATUS_VALUES[0]:
+        return order
     order.status = PAYMENT_ORDER_STATUS_VALUES[2]
     payment = Payment.query.filter_by(order_id=order.id).first()
     if payment:
         payment.status = "failed"
         if payment_id:
             payment.provider_payment_id = payment_id
+    return order
 
 
 def _get_or_create_manual_user(
@@ -183,14 +206,26 @@ def create_order():
                 jsonify(
                     {
                         "message": "Existing order in progress",
-                        "order": _serialize_order(existing_order),
+                        "order": order_schema.dump(existing_order),
                         "key": os.getenv("RAZORPAY_KEY_ID", ""),
                     }
                 ),
                 200,
             )
 
-        provider_order_id = payload.get("provider_order_id") or f"order_{secrets.token_hex(8)}"
+        provider_order_id = payload.get("provider_order_id")
+        client = get_client()
+        if not provider_order_id and client is not None:
+            try:
+                provider_order = client.create_order(
+                    amount,
+                    currency.upper(),
+                    receipt=f"user{user.id}-course{course.id}",
+                )
+            except ProviderError:
+                return jsonify({"message": "Payment provider unavailable"}), 503
+            provider_order_id = provider_order["id"]
+        provider_order_id = provider_order_id or f"order_{secrets.token_hex(8)}"
         order = PaymentOrder(
             provider_order_id=provider_order_id,
             user_id=user.id,
@@ -206,7 +241,7 @@ def create_order():
             jsonify(
                 {
                     "message": "Order created",
-                    "order": _serialize_order(order),
+                    "order": order_schema.dump(order),
                     "key": os.getenv("RAZORPAY_KEY_ID", ""),
                 }
             ),
@@ -219,10 +254,20 @@ def create_order():
 def _complete_payment_flow(
     order: PaymentOrder, payment_id: str, status: str
 ) -> Enrollment:
+    # Verify and webhook race on the same order; the row lock makes the
+    # loser wait and then take the already-paid branch below.
+    order = _lock_order(order)
+    if order.status == PAYMENT_ORDER_STATUS_VALUES[1]:
+        enrollment = _ensure_enrollment(order.user_id, order.course_id)
+        db.session.commit()
+        return enrollment
+
     payment = Payment.query.filter_by(order_id=order.id).first()
 
     if payment and payment.status == PAYMENT_STATUS_VALUES[1]:
-        return _ensure_enrollment(order.user_id, order.course_id)
+        enrollment = _ensure_enrollment(order.user_id, order.course_id)
+        db.session.commit()
+        return enrollment
 
     if not payment:
         payment = Payment(
@@ -241,6 +286,7 @@ def _complete_payment_flow(
     order.status = PAYMENT_ORDER_STATUS_VALUES[1]
     enrollment = _ensure_enrollment(order.user_id, order.course_id)
     db.session.commit()
+    _publish_order_status(order)
     return enrollment
 
 
@@ -274,26 +320,14 @@ def verify_payment():
         if order.status == PAYMENT_ORDER_STATUS_VALUES[2]:
             return jsonify({"message": "Order has already failed"}), 400
 
-        if order.status == "paid":
-            enrollment = _ensure_enrollment(order.user_id, order.course_id)
-            payment = _get_latest_payment(order)
-            db.session.commit()
-            return (
-                jsonify(
-                    {
-                        "message": "Payment already verified",
-                        "order": _serialize_order(order),
-                        "payment": _serialize_payment(payment) if payment else None,
-                        "enrollment": _serialize_enrollment(enrollment),
-                    }
-                ),
-                200,
-            )
+        if order.status == PAYMENT_ORDER_STATUS_VALUES[1]:
+            return _already_paid_response(order, "Payment already verified")
 
         secret = os.getenv("RAZORPAY_SECRET", "")
         if not is_valid_signature(order_id, payment_id, signature, secret):
-            _mark_payment_failed(order, payment_id)
+            order = _mark_payment_failed(order, payment_id)
             db.session.commit()
+            _publish_order_status(order)
             return jsonify({"message": "Invalid signature"}), 400
 
         enrollment = _complete_payment_flow(order, payment_id, PAYMENT_STATUS_VALUES[1])
@@ -303,9 +337,9 @@ def verify_payment():
             jsonify(
                 {
                     "message": "Payment verified",
-                    "order": _serialize_order(order),
-                    "payment": _serialize_payment(payment) if payment else None,
-                    "enrollment": _serialize_enrollment(enrollment),
+                    "order": order_schema.dump(order),
+                    "payment": payment_schema.dump(payment) if payment else None,
+                    "enrollment": enrollment_schema.dump(enrollment),
                 }
             ),
             200,
@@ -314,6 +348,59 @@ def verify_payment():
         return exc.to_response()
 
 
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_STREAM_SECONDS = 300
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@bp.route("/orders/<string:provider_order_id>/events", methods=["GET"])
+@jwt_required(optional=True)
+def order_events(provider_order_id: str):
+    """Stream status changes for one order as Server-Sent Events.
+
+    The stream ends once the order is ``paid`` or ``failed``, or after
+    ``SSE_MAX_STREAM_SECONDS``; ``EventSource`` reconnects on its own.
+    """
+    # Subscribe before reading the current status so no update slips between.
+    subscription = broker.subscribe(_order_channel(provider_order_id))
+    order = PaymentOrder.query.filter_by(provider_order_id=provider_order_id).first()
+    if not order:
+        subscription.close()
+        return jsonify({"message": "Order not found"}), 404
+
+    user_id = get_jwt_identity()
+    if user_id and order.user_id != int(user_id):
+        subscription.close()
+        return jsonify({"message": "Forbidden"}), 403
+
+    initial = {"order_id": order.provider_order_id, "status": order.status}
+    db.session.remove()
+
+    def stream():
+        with subscription:
+            yield "retry: 3000\n" + _sse("status", initial)
+            if initial["status"] != PAYMENT_ORDER_STATUS_VALUES[0]:
+                return
+            deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                message = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse("status", message)
+                if message["status"] != PAYMENT_ORDER_STATUS_VALUES[0]:
+                    return
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @bp.route("/webhook", methods=["POST"])
 def webhook():
     payload = request.get_json(silent=True) or {}
@@ -324,6 +411,12 @@ def webhook():
     if not (order_id and payment_id):
         return jsonify({"message": "Missing order or payment information"}), 400
 
+    dedup_key = event_key(
+        payload.get("event_id") or request.headers.get("X-Razorpay-Event-Id"), payment_id
+    )
+    if dedup_key and is_duplicate(dedup_key):
+        return jsonify({"message": "Duplicate webhook ignored", "order_id": order_id}), 200
+
     order = PaymentOrder.query.filter_by(provider_order_id=order_id).first()
     if not order:
         return jsonify({"message": "Order not found"}), 404
@@ -331,40 +424,80 @@ def webhook():
     if order.status == PAYMENT_ORDER_STATUS_VALUES[2]:
         return jsonify({"message": "Order has already failed"}), 400
 
-    if order.status == "paid":
-        enrollment = _ensure_enrollment(order.user_id, order.course_id)
-        payment = _get_latest_payment(order)
-        db.session.commit()
-        return (
-            jsonify(
-                {
-                    "message": "Webhook already processed",
-                    "order": _serialize_order(order),
-                    "payment": _serialize_payment(payment) if payment else None,
-                    "enrollment": _serialize_enrollment(enrollment),
-                }
-            ),
-            200,
-        )
+    if order.status == PAYMENT_ORDER_STATUS_VALUES[1]:
+        response = _already_paid_response(order, "Webhook already processed")
+        mark_processed(dedup_key, order_id)
+        return response
 
     secret = os.getenv("RAZORPAY_SECRET", "")
     if signature and not is_valid_signature(order_id, payment_id, signature, secret):
-        _mark_payment_failed(order, payment_id)
+        order = _mark_payment_failed(order, payment_id)
         db.session.commit()
+        _publish_order_status(order)
         return jsonify({"message": "Invalid signature"}), 400
 
     enrollment = _complete_payment_flow(
         order, payment_id, PAYMENT_STATUS_VALUES[1]
     )
     payment = _get_latest_payment(order)
+    mark_processed(dedup_key, order_id)
 
     return (
         jsonify(
             {
                 "message": "Webhook processed",
-                "order": _serialize_order(order),
-                "payment": _serialize_payment(payment) if payment else None,
-                "enrollment": _serialize_enrollment(enrollment),
+                "order": order_schema.dump(order),
+                "payment": payment_schema.dump(payment) if payment else None,
+                "enrollment": enrollment_schema.dump(enrollment),
+            }
+        ),
+        200,
+    )
+
+
+@bp.route("/orders/<string:provider_order_id>/reconcile", methods=["POST"])
+@require_roles("admin")
+def reconcile_order(provider_order_id: str):
+    """Complete an order from the provider's record when verify/webhook never landed."""
+    order = PaymentOrder.query.filter_by(provider_order_id=provider_order_id).first()
+    if not order:
+        return jsonify({"message": "Order not found"}), 404
+
+    if order.status == PAYMENT_ORDER_STATUS_VALUES[1]:
+        return _already_paid_response(order, "Order already paid")
+
+    client = get_client()
+    if client is None:
+        return jsonify({"message": "Payment provider not configured"}), 503
+    try:
+        provider_payments = client.fetch_order_payments(provider_order_id)
+    except ProviderError:
+        return jsonify({"message": "Payment provider unavailable"}), 503
+
+    captured = next(
+        (item for item in provider_payments if item.get("status") == "captured"), None
+    )
+    if not captured:
+        return (
+            jsonify(
+                {
+                    "message": "No captured payment for order",
+                    "order": order_schema.dump(order),
+                    "provider_statuses": [item.get("status") for item in provider_payments],
+                }
+            ),
+            200,
+        )
+
+    enrollment = _complete_payment_flow(order, captured["id"], PAYMENT_STATUS_VALUES[1])
+    payment = _get_latest_payment(order)
+    return (
+        jsonify(
+            {
+                "message": "Order reconciled",
+                "order": order_schema.dump(order),
+                "payment": payment_schema.dump(payment) if payment else None,
+                "enrollment": enrollment_schema.dump(enrollment),
             }
         ),
         200,
@@ -437,9 +570,9 @@ def manual_record_payment():
             jsonify(
                 {
                     "message": "Manual payment recorded",
-                    "order": _serialize_order(order),
-                    "payment": _serialize_payment(payment),
-                    "enrollment": _serialize_enrollment(enrollment),
+                    "order": order_schema.dump(order),
+                    "payment": payment_schema.dump(payment),
+                    "enrollment": enrollment_schema.dump(enrollment),
                 }
             ),
             201,
@@ -449,6 +582,274 @@ def manual_record_payment():
         return exc.to_response()
 
 
+MANUAL_BULK_MAX_ROWS = 1000
+MANUAL_BULK_MAX_BYTES = 1024 * 1024
+
+
+def _read_bulk_body() -> Optional[bytes]:
+    """The request body, or ``None`` if it is over ``MANUAL_BULK_MAX_BYTES``.
+
+    A chunked body has no Content-Length, so the stream is never read past
+    the limit.
+    """
+    if (request.content_length or 0) > MANUAL_BULK_MAX_BYTES:
+        return None
+    body = request.stream.read(MANUAL_BULK_MAX_BYTES + 1)
+    return body if len(body) <= MANUAL_BULK_MAX_BYTES else None
+
+
+def _read_bulk_rows(body: bytes) -> List[Dict]:
+    if request.mimetype == "text/csv":
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8", "replace")))
+        rows = [{key: value or None for key, value in row.items()} for row in reader]
+    elif request.is_json:
+        try:
+            payload = current_app.json.loads(body)
+        except ValueError:
+            payload = None
+        rows = payload.get("payments") if isinstance(payload, dict) else payload
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValidationError(
+                "Invalid JSON payload", {"body": "Must be an array of payment objects"}
+            )
+    else:
+        raise ValidationError(
+            "Expected JSON or CSV body",
+            {"content_type": "application/json or text/csv required"},
+        )
+
+    if not rows:
+        raise ValidationError("Invalid input", {"payments": "At least one row is required"})
+    if len(rows) > MANUAL_BULK_MAX_ROWS:
+        raise ValidationError(
+            "Invalid input", {"payments": f"At most {MANUAL_BULK_MAX_ROWS} rows per request"}
+        )
+    return rows
+
+
+def _parse_bulk_row(row: Dict) -> Dict:
+    try:
+        course_id = int(row.get("course_id") or "")
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid input", {"course_id": "Must be numeric"})
+
+    user_id = row.get("user_id")
+    email = name = None
+    if user_id:
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid input", {"user_id": "Must be numeric"})
+    else:
+        user_id = None
+        email = sanitize_string(row.get("email"), "email", required=True, max_length=255).lower()
+        name = sanitize_string(row.get("name"), "name", required=True, max_length=120)
+
+    amount = row.get("amount")
+    return {
+        "course_id": course_id,
+        "user_id": user_id,
+        "email": email,
+        "name": name,
+        "amount": None if amount in (None, "") else _get_amount(amount, Decimal("0")),
+        "currency": (
+            sanitize_string(row.get("currency"), "currency", max_length=10) or "INR"
+        ).upper(),
+        "provider_payment_id": sanitize_string(
+            row.get("provider_payment_id"), "provider_payment_id", max_length=255
+        )
+        or generate_secure_token("manual-payment"),
+        "provider_order_id": sanitize_string(
+            row.get("provider_order_id"), "provider_order_id", max_length=255
+        )
+        or generate_secure_token("manual-order"),
+        "notes": sanitize_string(row.get("notes"), "notes", max_length=500),
+    }
+
+
+def _hash_temp_passwords(count: int) -> List[str]:
+    # Hashing is deliberately slow and releases the GIL, so fan it out.
+    tokens = [generate_secure_token("temp-pass") for _ in range(count)]
+    with ThreadPoolExecutor(max_workers=min(8, max(count, 1))) as pool:
+        return list(pool.map(generate_password_hash, tokens))
+
+
+@bp.route("/manual-record/bulk", methods=["POST"])
+@require_roles("admin")
+def manual_record_payments_bulk():
+    """Record a batch of offline payments (JSON array or CSV) in one transaction."""
+    body = _read_bulk_body()
+    if body is None:
+        return jsonify({"message": f"Payload too large; limit is {MANUAL_BULK_MAX_BYTES} bytes"}), 413
+    try:
+        raw_rows = _read_bulk_rows(body)
+    except ValidationError as exc:
+        return exc.to_response()
+
+    results: List[Dict] = [{"row": index, "status": "pending"} for index in range(len(raw_rows))]
+    parsed: Dict[int, Dict] = {}
+    for index, raw in enumerate(raw_rows):
+        try:
+            parsed[index] = _parse_bulk_row(raw)
+        except ValidationError as exc:
+            results[index].update(status="error", errors=exc.errors or {"row": exc.message})
+
+    def _reject(index: int, field: str, message: str) -> None:
+        results[index].update(status="error", errors={field: message})
+        parsed.pop(index)
+
+    courses = {
+        course.id: course
+        for course in Course.query.filter(
+            Course.id.in_({row["course_id"] for row in parsed.values()})
+        )
+    }
+    users_by_id = {
+        user.id: user
+        for user in User.query.filter(
+            User.id.in_({row["user_id"] for row in parsed.values() if row["user_id"]})
+        )
+    }
+    user_ids_by_email = dict(
+        db.session.query(User.email, User.id).filter(
+            User.email.in_({row["email"] for row in parsed.values() if row["email"]})
+        )
+    )
+    taken_order_ids = {
+        provider_order_id
+        for (provider_order_id,) in db.session.query(PaymentOrder.provider_order_id).filter(
+            PaymentOrder.provider_order_id.in_(
+                {row["provider_order_id"] for row in parsed.values()}
+            )
+        )
+    }
+
+    new_users: Dict[str, str] = {}
+    for index, row in list(parsed.items()):
+        if row["course_id"] not in courses:
+            _reject(index, "course_id", "Course not found")
+        elif row["user_id"] and row["user_id"] not in users_by_id:
+            _reject(index, "user_id", "User not found")
+        elif row["provider_order_id"] in taken_order_ids:
+            _reject(index, "provider_order_id", "Order ID already recorded")
+        else:
+            taken_order_ids.add(row["provider_order_id"])
+            if row["email"] and row["email"] not in user_ids_by_email:
+                new_users.setdefault(row["email"], row["name"])
+
+    try:
+        if new_users:
+            password_hashes = _hash_temp_passwords(len(new_users))
+            inserted = db.session.execute(
+                insert(User).returning(User.email, User.id),
+                [
+                    {"name": name, "email": email, "password_hash": password_hash, "role": "student"}
+                    for (email, name), password_hash in zip(new_users.items(), password_hashes)
+                ],
+            )
+            user_ids_by_email.update(dict(inserted.all()))
+
+        for row in parsed.values():
+            row["user_id"] = row["user_id"] or user_ids_by_email[row["email"]]
+            if row["amount"] is None:
+                row["amount"] = Decimal(courses[row["course_id"]].price)
+
+        if parsed:
+            order_ids = dict(
+                db.session.execute(
+                    insert(PaymentOrder).returning(
+                        PaymentOrder.provider_order_id, PaymentOrder.id
+                    ),
+                    [
+                        {
+                            "provider_order_id": row["provider_order_id"],
+                            "user_id": row["user_id"],
+                            "course_id": row["course_id"],
+                            "amount": row["amount"],
+                            "currency": row["currency"],
+                            "status": PAYMENT_ORDER_STATUS_VALUES[1],
+                        }
+                        for row in parsed.values()
+                    ],
+                ).all()
+            )
+            recorded_by = get_jwt_identity()
+            payment_ids = dict(
+                db.session.execute(
+                    insert(Payment).returning(Payment.order_id, Payment.id),
+                    [
+                        {
+                            "user_id": row["user_id"],
+                            "course_id": row["course_id"],
+                            "amount": row["amount"],
+                            "status": PAYMENT_STATUS_VALUES[1],
+                            "provider_payment_id": row["provider_payment_id"],
+                            "order_id": order_ids[row["provider_order_id"]],
+                            "method": PAYMENT_METHOD_VALUES[1],
+                            "notes": row["notes"],
+                            "recorded_by_user_id": recorded_by,
+                        }
+                        for row in parsed.values()
+                    ],
+                ).all()
+            )
+
+            pairs = {(row["user_id"], row["course_id"]) for row in parsed.values()}
+            enrolled = set(
+                db.session.query(Enrollment.user_id, Enrollment.course_id).filter(
+                    tuple_(Enrollment.user_id, Enrollment.course_id).in_(pairs)
+                )
+            )
+            missing = pairs - enrolled
+            if missing:
+                now = datetime.utcnow()
+                db.session.execute(
+                    insert(Enrollment),
+                    [
+                        {
+                            "user_id": user_id,
+                            "course_id": course_id,
+                            "status": "active",
+                            "enrolled_at": now,
+                        }
+                        for user_id, course_id in missing
+                    ],
+                )
+
+            for index, row in parsed.items():
+                order_id = order_ids[row["provider_order_id"]]
+                pair = (row["user_id"], row["course_id"])
+                results[index].update(
+                    status="recorded",
+                    user_id=row["user_id"],
+                    course_id=row["course_id"],
+                    amount=float(row["amount"]),
+                    order_id=order_id,
+                    provider_order_id=row["provider_order_id"],
+                    payment_id=payment_ids[order_id],
+                    enrollment_created=pair in missing,
+                )
+                missing.discard(pair)
+
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Batch conflicts with existing records"}), 409
+
+    recorded = len(parsed)
+    return (
+        jsonify(
+            {
+                "message": "Manual payments processed",
+                "recorded": recorded,
+                "failed": len(results) - recorded,
+                "results": results,
+            }
+        ),
+        201 if recorded else 400,
+    )
+
+
 @bp.route("/checkout", methods=["POST"])
 @jwt_required(optional=True)
 def checkout():
@@ -458,5 +859,14 @@ def checkout():
 
 @bp.route("/", methods=["GET"])
 def list_payments():
-    payments = Payment.query.order_by(Payment.created_at.desc()).all()
-    return jsonify({"payments": [_serialize_payment(p) for p in payments]})
+    try:
+        fields = payment_schema.requested_fields()
+    except ValidationError as exc:
+        return exc.to_response()
+
+    payments = (
+        Payment.query.options(payment_schema.load_only(fields))
+        .order_by(Payment.created_at.desc())
+        .all()
+    )
+    return jsonify({"payments": payment_schema.dump_many(payments, fields)})
@@ -1,31 +1,141 @@
-from flask import Blueprint, jsonify
+import base64
+import re
+import secrets
+import time
+from urllib.parse import quote, urlencode
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import click
+from flask import Blueprint, Response, abort, current_app, jsonify, request, send_file
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
 
 from ..db import db
-from ..models import Attachment
+from ..models import Attachment, Blob, Course, Lesson, StorageUsage, User
+from ..query_budget import query_budget
 from ..security import ValidationError, require_json, sanitize_string
+from ..serializers import attachment_schema
+from ..services import quota
+from ..services.cache import LRUCache
+from ..services.signing import (
+    is_valid_download_signature,
+    is_valid_upload_signature,
+    sign_download,
+    sign_upload_params,
+)
+from ..services.storage import UploadError, get_storage
+from .auth import require_roles, user_has_role
+from .lessons import _is_enrolled
 
-bp = Blueprint("uploads", __name__, url_prefix="/api/uploads")
+bp = Blueprint("uploads", __name__, url_prefix="/api/uploads", cli_group="uploads")
+files_bp = Blueprint("files", __name__, url_prefix="/uploads")
 
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_FILE_URL_RE = re.compile(r"^/uploads/(?P<digest>[0-9a-f]{64})/(?P<filename>[^?#]+)$")
 
-def _serialize_attachment(attachment: Attachment) -> dict:
-    return {
-        "id": attachment.id,
-        "filename": attachment.filename,
-        "url": attachment.url,
-        "storage_provider": attachment.storage_provider,
-        "content_type": attachment.content_type,
-        "size_bytes": attachment.size_bytes,
-    }
+
+def _blob_url(blob: Blob, filename: str) -> str:
+    return f"/uploads/{blob.sha256}/{secure_filename(filename) or 'file'}"
+
+
+def _acquire_blob(digest: str, size: int, storage_key: str) -> Blob:
+    """Return the blob for ``digest``, creating it if needed, with one more reference.
+
+    The row stays locked until the caller commits, so ``gc`` can neither
+    delete it nor its file in the meantime.
+    """
+    blob = Blob.query.filter_by(sha256=digest).with_for_update().first()
+    if blob is None:
+        try:
+            with db.session.begin_nested():
+                blob = Blob(sha256=digest, size_bytes=size, storage_key=storage_key, ref_count=0)
+                db.session.add(blob)
+        except IntegrityError:
+            blob = Blob.query.filter_by(sha256=digest).with_for_update().one()
+    Blob.query.filter_by(id=blob.id).update({Blob.ref_count: Blob.ref_count + 1})
+    return blob
+
+
+def _reference_blob(blob_id: int) -> bool:
+    """Add a reference to a blob that is still referenced; ``gc`` only removes unreferenced ones."""
+    updated = Blob.query.filter(Blob.id == blob_id, Blob.ref_count > 0).update(
+        {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False
+    )
+    return updated == 1
+
+
+def _release_blob(blob_id: int) -> None:
+    Blob.query.filter_by(id=blob_id).update({Blob.ref_count: Blob.ref_count - 1})
 
 
-def _build_upload_url(storage: str, filename: str) -> str:
+def _quota_exceeded_response(user_id, additional_bytes: Optional[int]):
+    """Return a 413 response if ``additional_bytes`` would exceed the user's quota."""
+    if not additional_bytes or user_has_role(["admin"]):
+        return None
+    quota_bytes = current_app.config["STORAGE_QUOTA_BYTES"]
+    if quota.has_room(user_id, additional_bytes, quota_bytes):
+        return None
+    return (
+        jsonify(
+            {
+                "message": "Storage quota exceeded",
+                "bytes_used": quota.bytes_used(user_id),
+                "quota_bytes": quota_bytes,
+            }
+        ),
+        413,
+    )
+
+
+def _signing_secret() -> str:
+    return current_app.config["UPLOAD_SIGNING_SECRET"]
+
+
+def _build_upload_url(storage: str, filename: str, params: dict) -> str:
+    query = urlencode(params)
     storage = storage.lower()
     if storage == "s3":
-        return f"https://example-s3.local/{filename}?signature=dummy"
+        return f"https://example-s3.local/{quote(filename)}?{query}"
     if storage == "gcs":
-        return f"https://example-gcs.local/{filename}?signature=dummy"
-    return f"/uploads/{filename}"
+        return f"https://example-gcs.local/{quote(filename)}?{query}"
+    return f"/api/uploads/local/init?{query}"
+
+
+def _verified_upload_params() -> dict:
+    """Signed upload fields from the query string, or raise ``UploadError``."""
+    params = request.args.to_dict()
+    if not is_valid_upload_signature(params, _signing_secret()):
+        raise UploadError("Invalid or expired upload signature", 403)
+    if params["user_id"] != str(get_jwt_identity()):
+        raise UploadError("Upload was signed for another user", 403)
+    return params
+
+
+def _completed_attachment(upload_key: str) -> Optional[Attachment]:
+    """The attachment already created from the signed upload ``upload_key``, if any."""
+    return Attachment.query.filter_by(upload_key=upload_key).first()
+
+
+def _dedup_candidate(digest: str, user_id) -> Optional[Blob]:
+    """The stored blob for ``digest`` if ``user_id`` may link to it without uploading.
+
+    A claimed digest proves nothing about possessing the bytes, so only blobs
+    the caller already has an attachment for (or any blob, for admins) are
+    linked. Everyone else uploads normally; completion still stores the
+    content once.
+    """
+    blob = Blob.query.filter_by(sha256=digest).first()
+    if blob is None or user_has_role(["admin"]):
+        return blob
+    owned = (
+        db.session.query(Attachment.id)
+        .filter(Attachment.blob_id == blob.id, Attachment.created_by_user_id == user_id)
+        .first()
+    )
+    return blob if owned else None
 
 
 @bp.route("/sign", methods=["POST"])
@@ -43,23 +153,674 @@ def sign_upload():
             except (TypeError, ValueError):
                 raise ValidationError("Invalid input", {"size_bytes": "Must be numeric"})
 
-        upload_url = _build_upload_url(storage, filename)
-        attachment = Attachment(
-            filename=filename,
-            url=upload_url.split("?")[0],
-            storage_provider=storage,
-            content_type=content_type,
-            size_bytes=size_bytes,
-            created_by_user_id=get_jwt_identity(),
-        )
-        db.session.add(attachment)
-        db.session.commit()
+        digest = (payload.get("sha256") or "").strip().lower() or None
+        if digest is not None and not _SHA256_RE.match(digest):
+            raise ValidationError("Invalid input", {"sha256": "Must be a hex SHA-256 digest"})
+
+        over_quota = _quota_exceeded_response(get_jwt_identity(), size_bytes)
+        if over_quota:
+            return over_quota
 
+        if digest and storage.lower() == "local":
+            blob = _dedup_candidate(digest, get_jwt_identity())
+            if blob is not None:
+                over_quota = _quota_exceeded_response(get_jwt_identity(), blob.size_bytes)
+                if over_quota:
+                    return over_quota
+            # Same bytes already stored: link to them and skip the upload.
+            if blob is not None and _reference_blob(blob.id):
+                attachment = Attachment(
+                    filename=filename,
+                    url=_blob_url(blob, filename),
+                    storage_provider="local",
+                    content_type=content_type,
+                    size_bytes=blob.size_bytes,
+                    created_by_user_id=get_jwt_identity(),
+                    blob_id=blob.id,
+                )
+                db.session.add(attachment)
+                db.session.commit()
+                _forget_file_meta(blob.sha256)
+                return (
+                    jsonify(
+                        {
+                            "upload_url": None,
+                            "attachment": attachment_schema.dump(attachment),
+                            "storage": "local",
+                            "deduplicated": True,
+                        }
+                    ),
+                    201,
+                )
+
+        # Nothing is written until the upload completes; an abandoned upload
+        # leaves no row behind.
+        params = sign_upload_params(
+            {
+                "storage": storage.lower(),
+                "filename": filename,
+                "content_type": content_type,
+                "size_bytes": size_bytes,
+                "sha256": digest,
+                "user_id": get_jwt_identity(),
+                "upload_key": secrets.token_urlsafe(24),
+            },
+            _signing_secret(),
+            current_app.config["UPLOAD_URL_TTL_SECONDS"],
+        )
         response_payload = {
-            "upload_url": upload_url,
-            "attachment": _serialize_attachment(attachment),
+            "upload_url": _build_upload_url(storage, filename, params),
+            "complete_url": f"/api/uploads/complete?{urlencode(params)}",
+            "expires_at": int(params["expires"]),
+            "attachment": None,
             "storage": storage,
+            "deduplicated": False,
         }
         return jsonify(response_payload), 201
     except ValidationError as exc:  # pragma: no cover
         return exc.to_response()
+
+
+def _local_storage():
+    return get_storage(current_app.config["UPLOAD_ROOT"])
+
+
+def _upload_error_response(exc: UploadError):
+    return jsonify({"message": exc.message, **exc.details}), exc.status
+
+
+def _owned_upload(upload_id: str) -> dict:
+    storage = _local_storage()
+    meta = storage.load(upload_id)
+    if str(meta["user_id"]) != str(get_jwt_identity()):
+        raise UploadError("Upload not found", 404)
+    if storage.is_expired(meta):
+        storage.abort(upload_id)
+        raise UploadError("Upload session expired", 410)
+    return meta
+
+
+@bp.route("/local/init", methods=["POST"])
+@jwt_required()
+def init_local_upload():
+    """Open an upload session from a signed URL issued by ``/sign``."""
+    try:
+        params = _verified_upload_params()
+    except UploadError as exc:
+        return _upload_error_response(exc)
+    if params["storage"] != "local":
+        return jsonify({"message": "URL was not signed for local storage"}), 400
+    if _completed_attachment(params["upload_key"]) is not None:
+        return jsonify({"message": "Upload already completed"}), 409
+
+    upload_id = _local_storage().start(
+        {
+            "user_id": params["user_id"],
+            "filename": params["filename"],
+            "content_type": params["content_type"] or None,
+            "size_bytes": int(params["size_bytes"]) if params["size_bytes"] else None,
+            "sha256": params["sha256"] or None,
+            "upload_key": params["upload_key"],
+            # The session lives as long as the signed URL that opened it.
+            "expires": int(params["expires"]),
+        }
+    )
+    return (
+        jsonify(
+            {
+                "upload_id": upload_id,
+                "offset": 0,
+                "chunk_max_bytes": current_app.config["UPLOAD_CHUNK_MAX_BYTES"],
+            }
+        ),
+        201,
+    )
+
+
+@bp.route("/local/<string:upload_id>", methods=["GET"])
+@jwt_required()
+def local_upload_status(upload_id: str):
+    try:
+        meta = _owned_upload(upload_id)
+        offset = _local_storage().offset(upload_id)
+    except UploadError as exc:
+        return _upload_error_response(exc)
+    return jsonify({"upload_id": upload_id, "offset": offset, "size_bytes": meta["size_bytes"]})
+
+
+@bp.route("/local/<string:upload_id>", methods=["PUT"])
+@jwt_required()
+def put_local_chunk(upload_id: str):
+    """Append the raw request body at ``?offset=``; the body is streamed to disk."""
+    try:
+        offset = int(request.args.get("offset", ""))
+    except ValueError:
+        return jsonify({"message": "offset query parameter is required"}), 400
+
+    max_bytes = current_app.config["UPLOAD_CHUNK_MAX_BYTES"]
+    if (request.content_length or 0) > max_bytes:
+        return jsonify({"message": f"Chunk exceeds {max_bytes} bytes"}), 413
+
+    try:
+        meta = _owned_upload(upload_id)
+    except UploadError as exc:
+        return _upload_error_response(exc)
+
+    # Enforce the declared size and the quota before any byte reaches disk. A
+    # body without Content-Length is charged at the most it may send.
+    if meta["size_bytes"] is not None:
+        max_bytes = min(max_bytes, meta["size_bytes"] - offset)
+        if (request.content_length or 0) > max_bytes:
+            return jsonify({"message": "Upload exceeds declared size_bytes"}), 413
+    over_quota = _quota_exceeded_response(
+        meta["user_id"], offset + (request.content_length or max_bytes)
+    )
+    if over_quota:
+        return over_quota
+
+    try:
+        new_offset = _local_storage().write_chunk(
+            upload_id, offset, request.stream, max_bytes=max_bytes
+        )
+    except UploadError as exc:
+        return _upload_error_response(exc)
+    return jsonify({"upload_id": upload_id, "offset": new_offset})
+
+
+@bp.route("/local/<string:upload_id>/complete", methods=["POST"])
+@jwt_required()
+def complete_local_upload(upload_id: str):
+    payload = request.get_json(silent=True) or {}
+    storage = _local_storage()
+    try:
+        meta = _owned_upload(upload_id)
+        offset = storage.offset(upload_id)
+    except UploadError as exc:
+        return _upload_error_response(exc)
+
+    if meta["size_bytes"] is not None and offset != meta["size_bytes"]:
+        return jsonify({"message": "Upload incomplete", "offset": offset}), 409
+
+    over_quota = _quota_exceeded_response(meta["user_id"], offset)
+    if over_quota:
+        storage.abort(upload_id)
+        return over_quota
+
+    expected_digest = payload.get("sha256") or meta["sha256"]
+    claimed = []
+
+    def claim(size: int, digest: str, storage_key: str) -> None:
+        if expected_digest and str(expected_digest).lower() != digest:
+            raise UploadError("Checksum mismatch", 422, sha256=digest)
+        # Reference the blob before the file is placed, so gc cannot remove
+        # the stored copy this upload is about to rely on.
+        claimed.append(_acquire_blob(digest, size, storage_key))
+
+    try:
+        size, digest, storage_key = storage.finish(upload_id, claim)
+    except UploadError as exc:
+        return _upload_error_response(exc)
+
+    blob = claimed[0]
+    attachment = Attachment(
+        filename=meta["filename"],
+        url=_blob_url(blob, meta["filename"]),
+        storage_provider="local",
+        content_type=meta["content_type"],
+        size_bytes=size,
+        created_by_user_id=meta["user_id"],
+        blob_id=blob.id,
+        upload_key=meta.get("upload_key"),
+    )
+    db.session.add(attachment)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another session opened from the same signed URL completed first.
+        db.session.rollback()
+        if not Blob.query.filter_by(sha256=digest).first():
+            storage.delete(storage_key)
+        return jsonify({"message": "Upload already completed"}), 409
+    _forget_file_meta(digest)
+    return (
+        jsonify({"attachment": attachment_schema.dump(attachment), "sha256": digest}),
+        201,
+    )
+
+
+@bp.route("/complete", methods=["POST"])
+@jwt_required()
+def complete_remote_upload():
+    """Record an attachment once the client finished uploading to S3/GCS."""
+    try:
+        params = _verified_upload_params()
+    except UploadError as exc:
+        return _upload_error_response(exc)
+    if params["storage"] == "local":
+        return jsonify({"message": "Use the local upload session endpoints"}), 400
+    # Completing is idempotent: a replayed URL returns the attachment it created.
+    existing = _completed_attachment(params["upload_key"])
+    if existing is not None:
+        return jsonify({"attachment": attachment_schema.dump(existing)}), 200
+
+    size_bytes = int(params["size_bytes"]) if params["size_bytes"] else None
+    over_quota = _quota_exceeded_response(params["user_id"], size_bytes)
+    if over_quota:
+        return over_quota
+
+    upload_url = _build_upload_url(params["storage"], params["filename"], {})
+    attachment = Attachment(
+        filename=params["filename"],
+        url=upload_url.split("?")[0],
+        storage_provider=params["storage"],
+        content_type=params["content_type"] or None,
+        size_bytes=size_bytes,
+        created_by_user_id=params["user_id"],
+        upload_key=params["upload_key"],
+    )
+    db.session.add(attachment)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        existing = _completed_attachment(params["upload_key"])
+        return jsonify({"attachment": attachment_schema.dump(existing)}), 200
+    _forget_file_meta(params["sha256"])
+    return jsonify({"attachment": attachment_schema.dump(attachment)}), 201
+
+
+@bp.route("/local/<string:upload_id>", methods=["DELETE"])
+@jwt_required()
+def abort_local_upload(upload_id: str):
+    try:
+        _owned_upload(upload_id)
+    except UploadError as exc:
+        return _upload_error_response(exc)
+    _local_storage().abort(upload_id)
+    return jsonify({"message": "Upload aborted"})
+
+
+@bp.route("/<int:attachment_id>", methods=["DELETE"])
+@jwt_required()
+def delete_attachment(attachment_id: int):
+    attachment = Attachment.query.get(attachment_id)
+    if not attachment:
+        return jsonify({"message": "Attachment not found"}), 404
+    if str(attachment.created_by_user_id) != str(get_jwt_identity()) and not user_has_role(
+        ["admin"]
+    ):
+        return jsonify({"message": "Forbidden"}), 403
+
+    digest = attachment.blob.sha256 if attachment.blob is not None else None
+    if attachment.blob_id is not None:
+        _release_blob(attachment.blob_id)
+    db.session.delete(attachment)
+    db.session.commit()
+    _forget_file_meta(digest)
+    return jsonify({"message": "Attachment deleted"})
+
+
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 200
+
+
+def _encode_cursor(attachment: Attachment) -> str:
+    raw = f"{attachment.created_at.isoformat()}|{attachment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, attachment_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(attachment_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError("Invalid input", {"cursor": "Malformed cursor"})
+
+
+@bp.route("/", methods=["GET"])
+@query_budget(1)
+@jwt_required()
+def list_attachments():
+    """List attachments newest first using keyset pagination on ``(created_at, id)``.
+
+    Admins may pass ``user_id`` to browse another user's files, or omit it
+    to browse everyone's. ``content_type`` ending in ``/`` (e.g. ``video/``)
+    matches the whole family.
+    """
+    try:
+        limit = min(max(request.args.get("limit", LIST_DEFAULT_LIMIT, type=int), 1), LIST_MAX_LIMIT)
+        fields = attachment_schema.requested_fields()
+        # ``created_at`` is always loaded because the next cursor is built from it.
+        query = Attachment.query.options(attachment_schema.load_only(fields, "created_at"))
+
+        owner_id = request.args.get("user_id", type=int)
+        if user_has_role(["admin"]):
+            if owner_id is not None:
+                query = query.filter(Attachment.created_by_user_id == owner_id)
+        else:
+            query = query.filter(Attachment.created_by_user_id == get_jwt_identity())
+
+        storage_provider = request.args.get("storage_provider")
+        if storage_provider:
+            query = query.filter(Attachment.storage_provider == storage_provider.lower())
+        content_type = request.args.get("content_type")
+        if content_type:
+            if content_type.endswith("/"):
+                query = query.filter(Attachment.content_type.startswith(content_type, autoescape=True))
+            else:
+                query = query.filter(Attachment.content_type == content_type)
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            query = query.filter(
+                tuple_(Attachment.created_at, Attachment.id) < _decode_cursor(cursor)
+            )
+
+        # Fetch one extra row to know whether another page exists.
+        rows = (
+            query.order_by(Attachment.created_at.desc(), Attachment.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+    except ValidationError as exc:
+        return exc.to_response()
+
+    page = rows[:limit]
+    return jsonify(
+        {
+            "attachments": attachment_schema.dump_many(page, fields),
+            "next_cursor": _encode_cursor(page[-1]) if len(rows) > limit else None,
+        }
+    )
+
+
+@bp.route("/usage", methods=["GET"])
+@query_budget(1)
+@jwt_required()
+def my_storage_usage():
+    user_id = get_jwt_identity()
+    usage = db.session.get(StorageUsage, int(user_id))
+    return jsonify(
+        {
+            "user_id": int(user_id),
+            "bytes_used": usage.bytes_used if usage else 0,
+            "attachment_count": usage.attachment_count if usage else 0,
+            "quota_bytes": current_app.config["STORAGE_QUOTA_BYTES"],
+        }
+    )
+
+
+@bp.route("/usage/top", methods=["GET"])
+@require_roles("admin")
+def top_storage_consumers():
+    """Largest consumers, read from the ``storage_usage`` counters."""
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    rows = (
+        db.session.query(StorageUsage, User.email, User.name)
+        .join(User, StorageUsage.user_id == User.id)
+        .order_by(StorageUsage.bytes_used.desc())
+        .limit(limit)
+        .all()
+    )
+    return jsonify(
+        {
+            "users": [
+                {
+                    "user_id": usage.user_id,
+                    "email": email,
+                    "name": name,
+                    "bytes_used": usage.bytes_used,
+                    "attachment_count": usage.attachment_count,
+                }
+                for usage, email, name in rows
+            ]
+        }
+    )
+
+
+@bp.cli.command("gc")
+def collect_unreferenced_blobs():
+    """Delete blobs that no attachment references any more, and expired partial uploads.
+
+    Run it from cron or a maintenance job; a blob is removed only if its
+    reference count is still zero at the moment of the delete.
+    """
+    storage = _local_storage()
+    expired = storage.sweep_expired(current_app.config["UPLOAD_URL_TTL_SECONDS"])
+    click.echo(f"Removed {expired} expired partial upload(s)")
+    removed = 0
+    candidates = db.session.query(Blob.id, Blob.storage_key).filter(Blob.ref_count <= 0).all()
+    for blob_id, storage_key in candidates:
+        # Re-check under the row lock that completions take in _acquire_blob,
+        # and remove the file before committing, so an upload of the same
+        # content either keeps the blob alive or stores its own copy afresh.
+        locked = (
+            Blob.query.filter(Blob.id == blob_id, Blob.ref_count <= 0).with_for_update().first()
+        )
+        if locked is None:
+            db.session.rollback()
+            continue
+        db.session.delete(locked)
+        db.session.flush()
+        storage.delete(storage_key)
+        db.session.commit()
+        removed += 1
+    click.echo(f"Removed {removed} unreferenced blob(s)")
+
+
+FILE_META_TTL_SECONDS = 60
+
+
+class _FileMeta(NamedTuple):
+    blob_id: int
+    storage_key: str
+    size_bytes: int
+    created_at: datetime
+    # URL filename -> stored content type, for each attachment of the blob.
+    content_types: dict
+    # (course_id, instructor_id, is_free_preview) for lessons using the file.
+    lesson_refs: tuple
+
+
+_file_meta = LRUCache(maxsize=4096)
+_enrollments = LRUCache(maxsize=16384)
+
+
+def _load_file_meta(digest: str) -> Optional[_FileMeta]:
+    cached = _file_meta.get(digest)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    blob = Blob.query.filter_by(sha256=digest).first()
+    if blob is None:
+        return None
+    attachments = (
+        db.session.query(Attachment.url, Attachment.content_type)
+        .filter(Attachment.blob_id == blob.id)
+        .order_by(Attachment.id)
+        .all()
+    )
+    urls = [url for url, _ in attachments]
+    content_types: dict = {}
+    for url, content_type in attachments:
+        content_types.setdefault(url.rsplit("/", 1)[-1], content_type)
+    lesson_refs = (
+        db.session.query(Lesson.course_id, Course.instructor_id, Lesson.is_free_preview)
+        .join(Course, Lesson.course_id == Course.id)
+        .filter(Lesson.video_url.in_(urls))
+        .all()
+        if urls
+        else []
+    )
+    meta = _FileMeta(
+        blob_id=blob.id,
+        storage_key=blob.storage_key,
+        size_bytes=blob.size_bytes,
+        created_at=blob.created_at,
+        content_types=content_types,
+        lesson_refs=tuple(tuple(ref) for ref in lesson_refs),
+    )
+    _file_meta.set(digest, (time.monotonic() + FILE_META_TTL_SECONDS, meta))
+    return meta
+
+
+def _forget_file_meta(digest: Optional[str]) -> None:
+    """Drop this process's cached metadata after the digest's attachments change."""
+    if digest:
+        _file_meta.pop(digest)
+
+
+def _owns_blob(blob_id: int, user_id) -> bool:
+    # Not cached: gaining or losing ownership takes effect on the next request.
+    return (
+        db.session.query(Attachment.id)
+        .filter(Attachment.blob_id == blob_id, Attachment.created_by_user_id == user_id)
+        .first()
+        is not None
+    )
+
+
+def _can_read(meta: _FileMeta, user_id) -> bool:
+    if any(is_free for _, _, is_free in meta.lesson_refs):
+        return True
+    if user_id is None:
+        return False
+    user_key = str(user_id)
+    if user_has_role(["admin"]) or _owns_blob(meta.blob_id, user_id):
+        return True
+    for course_id, instructor_id, _ in meta.lesson_refs:
+        if str(instructor_id) == user_key:
+            return True
+        cache_key = (user_key, course_id)
+        cached = _enrollments.get(cache_key)
+        if cached and cached > time.monotonic():
+            return True
+        if _is_enrolled(user_id, course_id):
+            _enrollments.set(cache_key, time.monotonic() + FILE_META_TTL_SECONDS)
+            return True
+    return False
+
+
+@bp.route("/download-url", methods=["POST"])
+@jwt_required()
+def sign_download_url():
+    """Exchange a ``/uploads/...`` path for a short-lived URL that needs no token.
+
+    For ``<video>`` and ``<img>`` tags, which cannot send an Authorization
+    header. The URL is scoped to one file and carries no credentials.
+    """
+    try:
+        payload = require_json(max_bytes=4 * 1024)
+        url = sanitize_string(payload.get("url"), "url", required=True, max_length=1024)
+        match = _FILE_URL_RE.match(url.split("?")[0])
+        if not match:
+            raise ValidationError("Invalid input", {"url": "Must be an /uploads/<sha256>/<filename> path"})
+    except ValidationError as exc:
+        return exc.to_response()
+    digest = match.group("digest")
+    meta = _load_file_meta(digest)
+    if meta is None or match.group("filename") not in meta.content_types:
+        return jsonify({"message": "File not found"}), 404
+    if not _can_read(meta, get_jwt_identity()):
+        return jsonify({"message": "Access denied"}), 403
+    params = sign_download(
+        digest, _signing_secret(), current_app.config["DOWNLOAD_URL_TTL_SECONDS"]
+    )
+    return jsonify(
+        {
+            "url": f"{match.group(0)}?{urlencode(params)}",
+            "expires_at": int(params["expires"]),
+        }
+    )
+
+
+# Types served as stored; anything else goes out as application/octet-stream.
+SERVABLE_CONTENT_TYPES = frozenset(
+    {
+        "application/pdf",
+        "audio/mp4",
+        "audio/mpeg",
+        "audio/ogg",
+        "audio/wav",
+        "audio/webm",
+        "image/gif",
+        "image/jpeg",
+        "image/png",
+        "image/webp",
+        "text/plain",
+        "video/mp4",
+        "video/ogg",
+        "video/webm",
+    }
+)
+
+
+def _served_type(content_type: Optional[str]) -> tuple[str, bool]:
+    """The Content-Type to send for an attachment, and whether to show it inline.
+
+    The type recorded at upload is trusted only when it is on the allowlist;
+    only images and PDFs render inline, everything else is a download.
+    Media elements play ``attachment`` responses all the same.
+    """
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype not in SERVABLE_CONTENT_TYPES:
+        return "application/octet-stream", False
+    return mimetype, mimetype.startswith("image/") or mimetype == "application/pdf"
+
+
+@files_bp.route("/<string:digest>/<path:filename>", methods=["GET", "HEAD"])
+@jwt_required(optional=True)
+def serve_file(digest: str, filename: str):
+    """Serve a stored file with Range, ETag and Last-Modified support.
+
+    Callers either send a bearer token or use a URL signed by
+    ``POST /api/uploads/download-url``; tokens are never read from the URL.
+
+    With ``UPLOAD_ACCEL_REDIRECT_PREFIX`` set, nginx sends the bytes via
+    ``X-Accel-Redirect``; otherwise ``send_file`` hands the open file to the
+    server's ``wsgi.file_wrapper`` (``sendfile`` under gunicorn), or emits
+    ``X-Sendfile`` when ``USE_X_SENDFILE`` is on.
+    """
+    if not _SHA256_RE.match(digest):
+        abort(404)
+    meta = _load_file_meta(digest)
+    if meta is None or filename not in meta.content_types:
+        abort(404)
+    signed = "signature" in request.args and is_valid_download_signature(
+        digest, request.args, _signing_secret()
+    )
+    if not signed and not _can_read(meta, get_jwt_identity()):
+        return jsonify({"message": "Access denied"}), 403
+    db.session.remove()
+
+    mimetype, inline = _served_type(meta.content_types[filename])
+    accel_prefix = current_app.config.get("UPLOAD_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        response = Response(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{meta.storage_key}"
+        response.headers.set(
+            "Content-Disposition", "inline" if inline else "attachment", filename=filename
+        )
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.set_etag(digest)
+        response.last_modified = meta.created_at
+        return response
+
+    path = _local_storage().path_for(meta.storage_key)
+    if not path.exists():
+        abort(404)
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=not inline,
+        download_name=filename,
+        conditional=True,
+        etag=digest,
+        last_modified=meta.created_at,
+        max_age=3600,
+    )
+    # Content never changes under a digest, but access is per user.
+    response.cache_control.private = True
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
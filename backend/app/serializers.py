@@ -0,0 +1,187 @@
+"""Declarative response schemas shared by the blueprints.
+
+A :class:`Schema` maps output keys to model columns. The same declaration
+renders objects (:meth:`Schema.dump`), and turns a requested subset of keys
+into a ``load_only`` option, so queries only fetch the columns a response
+actually uses. Clients choose the subset with ``?fields=a,b``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from flask import request
+from sqlalchemy.orm import load_only
+
+from .models import (
+    Attachment,
+    Classwork,
+    Course,
+    Enrollment,
+    Lesson,
+    Payment,
+    PaymentOrder,
+    VideoClip,
+)
+from .security import ValidationError
+
+
+def _decimal(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _isoformat(value: Any) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class Field:
+    def __init__(self, attribute: Optional[str] = None, convert: Optional[Callable[[Any], Any]] = None):
+        self.attribute = attribute
+        self.convert = convert
+
+
+class Schema:
+    def __init__(self, model: type, fields: Dict[str, Optional[Field]]):
+        self.model = model
+        self.fields: Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]] = {}
+        for key, field in fields.items():
+            field = field or Field()
+            self.fields[key] = (field.attribute or key, field.convert)
+
+    def dump(self, obj: Any, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        result = {}
+        for key in fields or self.fields:
+            attribute, convert = self.fields[key]
+            value = getattr(obj, attribute)
+            result[key] = convert(value) if convert else value
+        return result
+
+    def dump_many(self, objs: Iterable[Any], fields: Optional[Iterable[str]] = None) -> list:
+        fields = tuple(fields or self.fields)
+        return [self.dump(obj, fields) for obj in objs]
+
+    def load_only(self, fields: Optional[Iterable[str]] = None, *extra: str):
+        """Loader option that fetches only the columns behind ``fields`` (plus ``extra``)."""
+        attributes = {self.fields[key][0] for key in fields or self.fields}
+        attributes.update(extra)
+        attributes.add("id")
+        return load_only(*(getattr(self.model, name) for name in sorted(attributes)))
+
+    def requested_fields(self, default: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+        """Keys from ``?fields=``, else ``default``, else every key; unknown keys are a 400."""
+        raw = request.args.get("fields")
+        if not raw:
+            return tuple(default or self.fields)
+        requested = tuple(dict.fromkeys(key.strip() for key in raw.split(",") if key.strip()))
+        unknown = [key for key in requested if key not in self.fields]
+        if unknown or not requested:
+            raise ValidationError(
+                "Invalid input",
+                {"fields": f"Unknown field(s): {', '.join(unknown)}" if unknown else "No fields given"},
+            )
+        return requested
+
+
+course_schema = Schema(
+    Course,
+    {
+        "id": None,
+        "slug": None,
+        "title": None,
+        "description": None,
+        "price": Field(convert=_decimal),
+    },
+)
+COURSE_SUMMARY_FIELDS = ("id", "title", "slug")
+
+lesson_schema = Schema(
+    Lesson,
+    {
+        "id": None,
+        "title": None,
+        "description": None,
+        "video_url": None,
+        "colab_notebook_url": None,
+        "notes_content": None,
+        "order_index": None,
+        "is_free_preview": None,
+    },
+)
+
+classwork_schema = Schema(
+    Classwork,
+    {
+        "id": None,
+        "title": None,
+        "description": None,
+        "due_at": Field(convert=_isoformat),
+        "course_id": None,
+    },
+)
+
+clip_schema = Schema(
+    VideoClip,
+    {
+        "id": None,
+        "title": None,
+        "start_seconds": None,
+        "end_seconds": None,
+        "notes": None,
+        "order_index": None,
+    },
+)
+
+enrollment_schema = Schema(
+    Enrollment,
+    {
+        "id": None,
+        "user_id": None,
+        "course_id": None,
+        "status": None,
+        "enrolled_at": Field(convert=_isoformat),
+    },
+)
+
+order_schema = Schema(
+    PaymentOrder,
+    {
+        "id": None,
+        "order_id": Field("provider_order_id"),
+        "user_id": None,
+        "course_id": None,
+        "amount": Field(convert=_decimal),
+        "currency": None,
+        "status": None,
+        "created_at": Field(convert=_isoformat),
+    },
+)
+
+payment_schema = Schema(
+    Payment,
+    {
+        "id": None,
+        "user_id": None,
+        "course_id": None,
+        "amount": Field(convert=_decimal),
+        "status": None,
+        "provider_payment_id": None,
+        "order_id": None,
+        "method": None,
+        "notes": None,
+        "recorded_by_user_id": None,
+        "created_at": Field(convert=_isoformat),
+    },
+)
+
+attachment_schema = Schema(
+    Attachment,
+    {
+        "id": None,
+        "filename": None,
+        "url": None,
+        "storage_provider": None,
+        "content_type": None,
+        "size_bytes": None,
+        "created_at": Field(convert=_isoformat),
+    },
+)
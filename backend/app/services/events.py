@@ -0,0 +1,166 @@
+"""In-process publish/subscribe with optional cross-worker fan-out.
+
+Each worker process owns one :data:`broker`. Publishing hands the message to
+the configured fan-out, which delivers it to every attached broker; with no
+fan-out configured only subscribers in the publishing process see it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import queue
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+try:  # Optional dependency; only needed when PUBSUB_URL points at Redis.
+    import redis
+except ImportError:  # pragma: no cover - depends on deployment
+    redis = None
+
+
+class Subscription:
+    """A bounded queue of messages for one channel; use as a context manager."""
+
+    def __init__(self, broker: "Broker", channel: str, maxsize: int = 100):
+        self.broker = broker
+        self.channel = channel
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, message: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            pass  # A stalled client loses intermediate updates, not the stream.
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AsyncSubscription(Subscription):
+    """A subscription read from an asyncio event loop; publishers may be any thread."""
+
+    def __init__(self, broker: "Broker", channel: str, maxsize: int = 100):
+        super().__init__(broker, channel, maxsize)
+        self._loop = asyncio.get_running_loop()
+        self._async_queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+
+    async def get_async(self) -> Dict[str, Any]:
+        return await self._async_queue.get()
+
+    def put(self, message: Dict[str, Any]) -> None:
+        self._loop.call_soon_threadsafe(self._put_nowait, message)
+
+    def _put_nowait(self, message: Dict[str, Any]) -> None:
+        try:
+            self._async_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+
+class Broker:
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.fanout: Optional["LocalFanout | RedisFanout"] = None
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def subscribe_async(self, channel: str) -> AsyncSubscription:
+        """Subscribe from a coroutine; messages arrive through ``get_async``."""
+        subscription = AsyncSubscription(self, channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        if self.fanout is not None:
+            self.fanout.publish(channel, message)
+        else:
+            self.deliver(channel, message)
+
+    def deliver(self, channel: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+
+class LocalFanout:
+    """Stand-in for a cross-worker bus: delivers to every attached broker in this process."""
+
+    def __init__(self) -> None:
+        self._brokers: Set[Broker] = set()
+
+    def attach(self, target: Broker) -> None:
+        self._brokers.add(target)
+        target.fanout = self
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        for target in list(self._brokers):
+            target.deliver(channel, message)
+
+
+class RedisFanout:
+    """Redis pub/sub bus; one listener thread per worker feeds the local broker."""
+
+    def __init__(self, url: str, prefix: str = "events:"):
+        if redis is None:
+            raise RuntimeError("PUBSUB_URL requires the 'redis' package to be installed")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._target: Optional[Broker] = None
+
+    def attach(self, target: Broker) -> None:
+        self._target = target
+        target.fanout = self
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(**{f"{self.prefix}*": self._on_message})
+        pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_message(self, raw: Dict[str, Any]) -> None:
+        channel = raw["channel"].decode()[len(self.prefix):]
+        self._target.deliver(channel, json.loads(raw["data"]))
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._client.publish(f"{self.prefix}{channel}", json.dumps(message))
+
+
+broker = Broker()
+
+
+def init_events(app) -> None:
+    """Attach the cross-worker fan-out configured by ``PUBSUB_URL``, if any."""
+    url = app.config.get("PUBSUB_URL") or os.getenv("PUBSUB_URL", "")
+    if broker.fanout is not None:
+        return
+    if url.startswith("redis"):
+        RedisFanout(url).attach(broker)
+    elif url == "local":
+        LocalFanout().attach(broker)
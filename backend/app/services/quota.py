@@ -0,0 +1,87 @@
+"""Per-user storage accounting.
+
+``storage_usage`` is adjusted in the same flush that inserts or deletes an
+``Attachment``, so reading a user's usage is a primary-key lookup rather
+than ``SUM(size_bytes)`` over their attachments.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..db import db
+from ..models import Attachment, StorageUsage
+
+_UPSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def _adjust(connection, user_id: Optional[int], size_delta: int, count_delta: int) -> None:
+    if user_id is None:
+        return
+    table = StorageUsage.__table__
+    now = datetime.utcnow()
+    upsert = _UPSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(table).values(
+            user_id=user_id,
+            bytes_used=max(size_delta, 0),
+            attachment_count=max(count_delta, 0),
+            updated_at=now,
+        )
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={
+                    "bytes_used": table.c.bytes_used + size_delta,
+                    "attachment_count": table.c.attachment_count + count_delta,
+                    "updated_at": now,
+                },
+            )
+        )
+        return
+
+    updated = connection.execute(
+        table.update()
+        .where(table.c.user_id == user_id)
+        .values(
+            bytes_used=table.c.bytes_used + size_delta,
+            attachment_count=table.c.attachment_count + count_delta,
+            updated_at=now,
+        )
+    )
+    if updated.rowcount == 0:
+        connection.execute(
+            table.insert().values(
+                user_id=user_id,
+                bytes_used=max(size_delta, 0),
+                attachment_count=max(count_delta, 0),
+                updated_at=now,
+            )
+        )
+
+
+@event.listens_for(Attachment, "after_insert")
+def _attachment_inserted(mapper, connection, target: Attachment) -> None:
+    _adjust(connection, target.created_by_user_id, target.size_bytes or 0, 1)
+
+
+@event.listens_for(Attachment, "after_delete")
+def _attachment_deleted(mapper, connection, target: Attachment) -> None:
+    _adjust(connection, target.created_by_user_id, -(target.size_bytes or 0), -1)
+
+
+def bytes_used(user_id) -> int:
+    usage = db.session.get(StorageUsage, int(user_id))
+    return usage.bytes_used if usage else 0
+
+
+def has_room(user_id, additional_bytes: int, quota_bytes: int) -> bool:
+    """``quota_bytes <= 0`` means unlimited."""
+    if quota_bytes <= 0:
+        return True
+    return bytes_used(user_id) + max(additional_bytes, 0) <= quota_bytes
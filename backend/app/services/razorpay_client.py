@@ -0,0 +1,199 @@
+"""Pooled HTTP client for the Razorpay Orders API."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import urllib3
+from urllib3.exceptions import HTTPError
+from urllib3.util import Retry, Timeout
+
+DEFAULT_API_BASE = "https://api.razorpay.com/v1"
+
+
+class ProviderError(Exception):
+    """Raised when the payment provider rejects or fails a request."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without contacting the provider while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures, probe after ``reset_after``."""
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_after:
+                raise CircuitOpenError("Payment provider circuit is open")
+            # Half-open: let this call through as a probe and re-arm the timer
+            # so concurrent callers keep failing fast until it resolves.
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+
+class RazorpayClient:
+    """Keep-alive connection pool with timeouts, retries and a circuit breaker.
+
+    POST requests are only retried on connection errors, so a request that
+    reached the provider is never replayed.
+    """
+
+    def __init__(
+        self,
+        key_id: str,
+        secret: str,
+        *,
+        base_url: str = DEFAULT_API_BASE,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        retries: int = 2,
+        pool_size: int = 10,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker or CircuitBreaker()
+        self._headers = urllib3.make_headers(
+            basic_auth=f"{key_id}:{secret}", keep_alive=True
+        )
+        self._headers["Content-Type"] = "application/json"
+        self._pool = urllib3.PoolManager(
+            num_pools=2,
+            maxsize=pool_size,
+            block=False,
+            timeout=Timeout(connect=connect_timeout, read=read_timeout),
+            retries=Retry(
+                total=retries,
+                connect=retries,
+                read=retries,
+                status=retries,
+                backoff_factor=0.2,
+                status_forcelist=(429, 502, 503, 504),
+                raise_on_status=False,
+            ),
+        )
+
+    def _request(self, method: str, path: str, body: Optional[Dict] = None) -> Dict[str, Any]:
+        self.breaker.before_call()
+        try:
+            response = self._pool.request(
+                method,
+                f"{self.base_url}{path}",
+                body=json.dumps(body).encode() if body is not None else None,
+                headers=self._headers,
+            )
+        except HTTPError as exc:
+            self.breaker.record_failure()
+            raise ProviderError(f"Payment provider unreachable: {exc}") from exc
+
+        if response.status >= 500 or response.status == 429:
+            self.breaker.record_failure()
+            raise ProviderError("Payment provider unavailable", response.status)
+        self.breaker.record_success()
+
+        try:
+            data = json.loads(response.data or b"{}")
+        except ValueError as exc:
+            raise ProviderError("Invalid provider response", response.status) from exc
+        if response.status >= 400:
+            error = data.get("error") or {}
+            raise ProviderError(error.get("description") or "Provider rejected request", response.status)
+        return data
+
+    def create_order(
+        self,
+        amount: Decimal,
+        currency: str,
+        *,
+        receipt: Optional[str] = None,
+        notes: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Create an order; ``amount`` is in major units and sent in paise."""
+        body: Dict[str, Any] = {
+            "amount": int(Decimal(amount) * 100),
+            "currency": currency,
+        }
+        if receipt:
+            body["receipt"] = receipt
+        if notes:
+            body["notes"] = notes
+        return self._request("POST", "/orders", body)
+
+    def fetch_order(self, order_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/orders/{order_id}")
+
+    def fetch_order_payments(self, order_id: str) -> List[Dict[str, Any]]:
+        return self._request("GET", f"/orders/{order_id}/payments").get("items", [])
+
+    def close(self) -> None:
+        self._pool.clear()
+
+
+_client: Optional[RazorpayClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Optional[RazorpayClient]:
+    """Return the process-wide client, or ``None`` when no credentials are set."""
+    global _client
+    if _client is not None:
+        return _client
+
+    key_id = os.getenv("RAZORPAY_KEY_ID", "")
+    secret = os.getenv("RAZORPAY_SECRET", "")
+    if not (key_id and secret):
+        return None
+
+    with _client_lock:
+        if _client is None:
+            _client = RazorpayClient(
+                key_id,
+                secret,
+                base_url=os.getenv("RAZORPAY_API_BASE", DEFAULT_API_BASE),
+                connect_timeout=float(os.getenv("RAZORPAY_CONNECT_TIMEOUT", "3")),
+                read_timeout=float(os.getenv("RAZORPAY_READ_TIMEOUT", "10")),
+                retries=int(os.getenv("RAZORPAY_RETRIES", "2")),
+                pool_size=int(os.getenv("RAZORPAY_POOL_SIZE", "10")),
+            )
+    return _client
+
+
+def reset_client() -> None:
+    """Drop the pooled client, e.g. after a fork or when settings change."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
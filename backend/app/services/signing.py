@@ -0,0 +1,84 @@
+"""Stateless HMAC signatures for upload and download URLs."""
+
+import hmac
+import json
+import time
+from hashlib import sha256
+from typing import Mapping, Optional
+
+SIGNED_UPLOAD_FIELDS = (
+    "storage",
+    "filename",
+    "content_type",
+    "size_bytes",
+    "sha256",
+    "user_id",
+    "upload_key",
+    "expires",
+)
+
+
+def _signed_message(fields: Mapping[str, str]) -> bytes:
+    # JSON keeps field boundaries unambiguous whatever the values contain.
+    return json.dumps(fields, sort_keys=True, separators=(",", ":")).encode()
+
+
+def compute_upload_signature(params: Mapping[str, str], secret: str) -> str:
+    """Compute the signature over the signed upload fields of ``params``."""
+    message = _signed_message({field: str(params.get(field, "")) for field in SIGNED_UPLOAD_FIELDS})
+    return hmac.new(secret.encode(), message, sha256).hexdigest()
+
+
+def sign_upload_params(params: Mapping[str, object], secret: str, ttl_seconds: int) -> dict:
+    """Return ``params`` as strings with ``expires`` and ``signature`` added."""
+    signed = {field: "" if params.get(field) is None else str(params[field]) for field in SIGNED_UPLOAD_FIELDS}
+    signed["expires"] = str(int(time.time()) + ttl_seconds)
+    signed["signature"] = compute_upload_signature(signed, secret)
+    return signed
+
+
+def is_valid_upload_signature(
+    params: Mapping[str, str], secret: str, now: Optional[float] = None
+) -> bool:
+    """Check the signature and expiry without touching the database.
+
+    Every signed field must be present: a dropped field would otherwise
+    verify as if it had been signed empty.
+    """
+    provided_signature = params.get("signature")
+    if not provided_signature or any(field not in params for field in SIGNED_UPLOAD_FIELDS):
+        return False
+    try:
+        expires = int(params.get("expires", ""))
+    except ValueError:
+        return False
+    if expires < (now if now is not None else time.time()):
+        return False
+    expected_signature = compute_upload_signature(params, secret)
+    return hmac.compare_digest(expected_signature, provided_signature)
+
+
+def compute_download_signature(digest: str, expires: str, secret: str) -> str:
+    """Compute the signature that lets the holder fetch the file ``digest`` until ``expires``."""
+    message = _signed_message({"purpose": "download", "sha256": digest, "expires": expires})
+    return hmac.new(secret.encode(), message, sha256).hexdigest()
+
+
+def sign_download(digest: str, secret: str, ttl_seconds: int) -> dict:
+    """Return the ``expires`` and ``signature`` query parameters for one file."""
+    expires = str(int(time.time()) + ttl_seconds)
+    return {"expires": expires, "signature": compute_download_signature(digest, expires, secret)}
+
+
+def is_valid_download_signature(
+    digest: str, params: Mapping[str, str], secret: str, now: Optional[float] = None
+) -> bool:
+    """Check a download signature and its expiry."""
+    provided_signature = params.get("signature")
+    expires = params.get("expires", "")
+    if not provided_signature or not expires.isdigit():
+        return False
+    if int(expires) < (now if now is not None else time.time()):
+        return False
+    expected_signature = compute_download_signature(digest, expires, secret)
+    return hmac.compare_digest(expected_signature, provided_signature)
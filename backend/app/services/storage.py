@@ -0,0 +1,251 @@
+"""Local disk storage with chunked, resumable uploads.
+
+An upload session is a ``.part`` file plus a small JSON sidecar under
+``<root>/.partial``. The size of the ``.part`` file is the authoritative
+offset, so a session survives worker restarts; the running SHA-256 is kept
+in memory and rebuilt from the partial file when it is missing. Sessions
+expire with the signed URL that opened them; :meth:`LocalStorage.sweep_expired`
+removes abandoned ones.
+
+Completed uploads are content-addressed: they are stored once under their
+SHA-256 (see :meth:`LocalStorage.blob_key`) however many attachments use them.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Optional, Tuple
+
+READ_BLOCK_BYTES = 1024 * 1024
+_UPLOAD_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class UploadError(Exception):
+    """Raised for upload session problems; carries the HTTP status to return."""
+
+    def __init__(self, message: str, status: int = 400, **details: Any):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.details = details
+
+
+class LocalStorage:
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+        self.partial_dir = self.root / ".partial"
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, upload_id: str) -> Tuple[Path, Path]:
+        if not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadError("Upload not found", 404)
+        return (
+            self.partial_dir / f"{upload_id}.part",
+            self.partial_dir / f"{upload_id}.json",
+        )
+
+    def path_for(self, storage_key: str) -> Path:
+        return self.root / storage_key
+
+    @staticmethod
+    def blob_key(digest: str) -> str:
+        return f"{digest[:2]}/{digest}"
+
+    def start(self, meta: Dict[str, Any]) -> str:
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._prune_hashers()
+        upload_id = secrets.token_urlsafe(18)
+        part_path, meta_path = self._paths(upload_id)
+        part_path.touch()
+        meta_path.write_text(json.dumps(meta))
+        return upload_id
+
+    def load(self, upload_id: str) -> Dict[str, Any]:
+        _, meta_path = self._paths(upload_id)
+        try:
+            return json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            raise UploadError("Upload not found", 404)
+
+    def offset(self, upload_id: str) -> int:
+        part_path, _ = self._paths(upload_id)
+        try:
+            return part_path.stat().st_size
+        except FileNotFoundError:
+            raise UploadError("Upload not found", 404)
+
+    def _hasher_at(self, upload_id: str, part_path: Path, offset: int) -> "hashlib._Hash":
+        with self._lock:
+            cached = self._hashers.get(upload_id)
+        if cached and cached[0] == offset:
+            return cached[1]
+        # Another worker wrote the earlier chunks (or we restarted): rehash once.
+        hasher = hashlib.sha256()
+        with part_path.open("rb") as existing:
+            for block in iter(lambda: existing.read(READ_BLOCK_BYTES), b""):
+                hasher.update(block)
+        return hasher
+
+    def write_chunk(
+        self, upload_id: str, offset: int, stream: IO[bytes], *, max_bytes: int
+    ) -> int:
+        """Append ``stream`` at ``offset`` without buffering it; return the new offset."""
+        part_path, _ = self._paths(upload_id)
+        try:
+            handle = part_path.open("r+b")
+        except FileNotFoundError:
+            raise UploadError("Upload not found", 404)
+
+        with handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError("Another chunk is being written", 409)
+
+            current = os.fstat(handle.fileno()).st_size
+            if offset != current:
+                raise UploadError("Offset mismatch", 409, offset=current)
+
+            hasher = self._hasher_at(upload_id, part_path, current)
+            handle.seek(current)
+            written = 0
+            try:
+                for block in iter(lambda: stream.read(READ_BLOCK_BYTES), b""):
+                    written += len(block)
+                    if written > max_bytes:
+                        raise UploadError(f"Chunk exceeds {max_bytes} bytes", 413)
+                    handle.write(block)
+                    hasher.update(block)
+                handle.flush()
+            except BaseException:
+                # Drop the partial chunk so the client can resend it from ``offset``.
+                handle.truncate(current)
+                with self._lock:
+                    self._hashers.pop(upload_id, None)
+                raise
+
+        with self._lock:
+            self._hashers[upload_id] = (current + written, hasher)
+        return current + written
+
+    def finish(
+        self, upload_id: str, claim: Optional[Callable[[int, str, str], Any]] = None
+    ) -> Tuple[int, str, str]:
+        """Move the completed upload to its content address.
+
+        Returns ``(size, sha256 hex, storage key)``. ``claim(size, digest,
+        storage_key)`` runs once the digest is known but before the file is
+        placed, so the caller can reference the blob first; if it raises, the
+        upload is discarded. If the content is already stored, the new copy
+        is discarded. Raises ``UploadError`` (409) while a chunk or another
+        completion holds the session, and 404 once it is gone.
+        """
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            handle = part_path.open("rb")
+        except FileNotFoundError:
+            raise UploadError("Upload not found", 404)
+
+        with handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError("Upload is busy", 409)
+            # A completion that held the lock before us has already moved the file.
+            if not part_path.exists():
+                raise UploadError("Upload not found", 404)
+
+            size = os.fstat(handle.fileno()).st_size
+            digest = self._hasher_at(upload_id, part_path, size).hexdigest()
+            storage_key = self.blob_key(digest)
+            if claim is not None:
+                try:
+                    claim(size, digest, storage_key)
+                except BaseException:
+                    self.abort(upload_id)
+                    raise
+            target = self.path_for(storage_key)
+            if target.exists():
+                part_path.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(part_path, target)
+            meta_path.unlink(missing_ok=True)
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        return size, digest, storage_key
+
+    def delete(self, storage_key: str) -> None:
+        self.path_for(storage_key).unlink(missing_ok=True)
+
+    def abort(self, upload_id: str) -> None:
+        part_path, meta_path = self._paths(upload_id)
+        part_path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+
+    @staticmethod
+    def is_expired(meta: Dict[str, Any], now: Optional[float] = None) -> bool:
+        expires = meta.get("expires")
+        return expires is not None and expires < (now if now is not None else time.time())
+
+    def sweep_expired(self, max_age_seconds: int, now: Optional[float] = None) -> int:
+        """Remove expired upload sessions; return how many were removed.
+
+        Sessions without an ``expires`` (and ``.part`` files without a sidecar)
+        are removed once untouched for ``max_age_seconds``.
+        """
+        now = now if now is not None else time.time()
+        removed = 0
+        if not self.partial_dir.exists():
+            return removed
+        for part_path in self.partial_dir.glob("*.part"):
+            upload_id = part_path.stem
+            if not _UPLOAD_ID_RE.match(upload_id):
+                continue
+            meta_path = part_path.with_suffix(".json")
+            try:
+                meta = json.loads(meta_path.read_text())
+                expired = self.is_expired(meta, now)
+                if meta.get("expires") is None:
+                    expired = part_path.stat().st_mtime + max_age_seconds < now
+            except FileNotFoundError:
+                try:
+                    expired = part_path.stat().st_mtime + max_age_seconds < now
+                except FileNotFoundError:
+                    continue  # completed or aborted meanwhile
+            except ValueError:
+                expired = True
+            if expired:
+                self.abort(upload_id)
+                removed += 1
+        return removed
+
+    def _prune_hashers(self) -> None:
+        """Forget running hashes of sessions whose files are gone (swept or completed elsewhere)."""
+        with self._lock:
+            upload_ids = list(self._hashers)
+        for upload_id in upload_ids:
+            if not (self.partial_dir / f"{upload_id}.part").exists():
+                with self._lock:
+                    self._hashers.pop(upload_id, None)
+
+
+_storages: Dict[str, LocalStorage] = {}
+
+
+def get_storage(root: str) -> LocalStorage:
+    storage: Optional[LocalStorage] = _storages.get(root)
+    if storage is None:
+        storage = _storages.setdefault(root, LocalStorage(root))
+    return storage
@@ -0,0 +1,47 @@
+"""Deduplication of provider webhook deliveries."""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..db import db
+from ..models import WebhookEvent
+from .cache import LRUCache
+
+_seen = LRUCache(maxsize=int(os.getenv("WEBHOOK_DEDUP_CACHE_SIZE", "10000")))
+
+
+def event_key(event_id: Optional[str], payment_id: Optional[str]) -> Optional[str]:
+    """Prefer the provider event ID; fall back to the payment ID."""
+    if event_id:
+        return f"event:{event_id}"
+    if payment_id:
+        return f"payment:{payment_id}"
+    return None
+
+
+def is_duplicate(key: str) -> bool:
+    """Check the in-memory cache, then the ``webhook_events`` table."""
+    if key in _seen:
+        return True
+    found = db.session.execute(
+        select(WebhookEvent.id).where(WebhookEvent.event_key == key).limit(1)
+    ).first()
+    if found:
+        _seen.set(key)
+        return True
+    return False
+
+
+def mark_processed(key: str, provider_order_id: Optional[str] = None) -> None:
+    """Persist ``key``; call only after the delivery was authenticated and handled."""
+    db.session.add(WebhookEvent(event_key=key, provider_order_id=provider_order_id))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # A concurrent delivery recorded it first.
+    _seen.set(key)
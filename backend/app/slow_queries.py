@@ -0,0 +1,153 @@
+"""Slow-query log with per-fingerprint aggregation and EXPLAIN capture.
+
+Statements that take at least ``SLOW_QUERY_THRESHOLD_MS`` are logged on the
+``app.slow_queries`` logger with their bound parameters and the Flask
+endpoint that issued them. They are also aggregated per process under a
+normalized fingerprint, with literals and placeholders replaced by ``?``.
+On PostgreSQL, the first slow sample of each SELECT fingerprint is
+``EXPLAIN``-ed on a background thread, off the request path.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from .db import db
+from .services.cache import LRUCache
+
+logger = logging.getLogger("app.slow_queries")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+PARAMS_REPR_LIMIT = 500
+
+_stats = LRUCache(maxsize=int(os.getenv("SLOW_QUERY_FINGERPRINTS", "500")))
+_stats_lock = threading.Lock()
+_explainer: Optional[ThreadPoolExecutor] = None
+
+
+def fingerprint(statement: str) -> str:
+    """Collapse a statement to its shape so that variants group together."""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _PLACEHOLDER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    return _SPACE_RE.sub(" ", normalized).strip()
+
+
+def _explain(engine, key: str, statement: str, parameters: Any) -> None:
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+        plan = "\n".join(row[0] for row in rows)
+    except Exception as exc:  # pragma: no cover - depends on the statement
+        plan = f"EXPLAIN failed: {exc}"
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is not None:
+            entry["plan"] = plan
+
+
+def _record(conn, statement: str, parameters: Any, elapsed_ms: float, explain: bool) -> None:
+    endpoint = (request.endpoint or "unmatched") if has_request_context() else None
+    params = repr(parameters)[:PARAMS_REPR_LIMIT]
+    logger.warning(
+        "Slow query (%.1f ms) in %s: %s params=%s",
+        elapsed_ms,
+        endpoint or "-",
+        _SPACE_RE.sub(" ", statement),
+        params,
+    )
+
+    key = fingerprint(statement)
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = {
+                "fingerprint": key,
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "endpoints": [],
+                "sample": statement,
+                "sample_params": params,
+                "plan": None,
+            }
+            _stats.set(key, entry)
+            needs_plan = explain
+        else:
+            needs_plan = False
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        if elapsed_ms > entry["max_ms"]:
+            entry["max_ms"] = elapsed_ms
+            entry["sample"] = statement
+            entry["sample_params"] = params
+        if endpoint and endpoint not in entry["endpoints"]:
+            entry["endpoints"].append(endpoint)
+
+    if needs_plan and _explainer is not None and key.lstrip("( ").upper().startswith(("SELECT", "WITH")):
+        _explainer.submit(_explain, conn.engine, key, statement, parameters)
+
+
+def top_statements(limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+    """Aggregated slow statements of this process, slowest first."""
+    with _stats_lock:
+        entries = [dict(entry, endpoints=list(entry["endpoints"])) for _, entry in _stats.items()]
+    entries.sort(key=lambda entry: entry[order_by], reverse=True)
+    for entry in entries:
+        entry["mean_ms"] = round(entry["total_ms"] / entry["count"], 2)
+        entry["total_ms"] = round(entry["total_ms"], 2)
+        entry["max_ms"] = round(entry["max_ms"], 2)
+    return entries[:limit]
+
+
+def reset() -> None:
+    _stats.clear()
+
+
+def init_slow_query_log(app) -> None:
+    """Time every statement and record those over ``SLOW_QUERY_THRESHOLD_MS`` (``0`` disables)."""
+    global _explainer
+    app.config.setdefault(
+        "SLOW_QUERY_THRESHOLD_MS", float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "250"))
+    )
+    app.config.setdefault(
+        "SLOW_QUERY_EXPLAIN", os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    )
+    threshold_ms = app.config["SLOW_QUERY_THRESHOLD_MS"]
+    if threshold_ms <= 0:
+        return
+
+    with app.app_context():
+        engines = list(db.engines.values())
+        dialect = db.engine.dialect.name
+    explain = app.config["SLOW_QUERY_EXPLAIN"] and dialect == "postgresql"
+    if explain and _explainer is None:
+        _explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Per statement, so a statement that raises leaves nothing behind.
+        context._slow_query_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._slow_query_start) * 1000
+        if elapsed_ms >= threshold_ms and not statement.startswith("EXPLAIN "):
+            sample = parameters[0] if executemany and parameters else parameters
+            _record(conn, statement, sample, elapsed_ms, explain and not executemany)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,5 @@
+"""ASGI entry point: ``uvicorn asgi:app``."""
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
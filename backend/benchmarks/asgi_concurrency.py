@@ -0,0 +1,104 @@
+"""Check that Flask routes served over ASGI run concurrently.
+
+Adds a route that sleeps for ``--sleep`` seconds to a fresh app, then sends
+``--requests`` requests at once through :class:`app.asgi.AsyncApp`, and for
+comparison through asgiref's plain ``WsgiToAsgi``. The requests overlap when
+the batch takes about one sleep rather than one sleep per request. Exits
+non-zero when the ASGI app serialises them.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.asgi_concurrency --requests 4 --sleep 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+async def _request(app, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench.local")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench.local", 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def _batch(app, count: int) -> float:
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(_request(app, "/_bench/sleep") for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    if any(status != 200 for status in statuses):
+        raise SystemExit(f"unexpected statuses: {statuses}")
+    return elapsed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--sleep", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="asgi-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+    os.environ.setdefault("ASGI_WSGI_THREADS", str(args.requests))
+
+    from asgiref.wsgi import WsgiToAsgi
+
+    from app import create_app
+    from app.asgi import create_asgi_app
+
+    flask_app = create_app()
+    threads = set()
+
+    def sleep():
+        threads.add(threading.current_thread().name)
+        time.sleep(args.sleep)
+        return {"slept": args.sleep}
+
+    flask_app.add_url_rule("/_bench/sleep", "bench_sleep", sleep)
+
+    print(f"{args.requests} concurrent requests, {args.sleep:.2f}s each")
+    results = {}
+    for label, app in (("asgiref", WsgiToAsgi(flask_app)), ("AsyncApp", create_asgi_app(flask_app))):
+        threads.clear()
+        results[label] = asyncio.run(_batch(app, args.requests))
+        print(f"{label:>9}: {results[label]:6.2f}s on {len(threads)} thread(s)")
+
+    # Overlapping requests finish in about one sleep; serialised ones take one each.
+    if results["AsyncApp"] > args.sleep * min(2, args.requests):
+        print("FAIL: WSGI requests did not overlap")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Compare Flask's stdlib JSON provider with the orjson provider on large listings.
+
+The payloads mimic the payment and course listings as the schemas in
+``app.serializers`` dump them, plus a variant that leaves ``Decimal`` and
+``datetime`` values for the provider to convert.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.json_serialization --rows 10000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import OrjsonProvider
+
+
+def _payments(rows: int, raw: bool) -> dict:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for index in range(rows):
+        amount = Decimal("499.00") + index % 7
+        created_at = start + timedelta(minutes=index)
+        items.append(
+            {
+                "id": index,
+                "user_id": index % 500,
+                "course_id": index % 40,
+                "amount": amount if raw else float(amount),
+                "status": "paid",
+                "method": "razorpay",
+                "provider_payment_id": f"pay_{index:012d}",
+                "notes": None,
+                "created_at": created_at if raw else created_at.isoformat(),
+            }
+        )
+    return {"payments": items}
+
+
+def _courses(rows: int, raw: bool) -> dict:
+    return {
+        "courses": [
+            {
+                "id": index,
+                "slug": f"course-{index}",
+                "title": f"Course number {index}",
+                "description": "Learn things in depth. " * 8,
+                "price": Decimal("999.00") if raw else 999.0,
+            }
+            for index in range(rows)
+        ]
+    }
+
+
+def _time(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    providers = {"stdlib": DefaultJSONProvider(app), "orjson": OrjsonProvider(app)}
+    payloads = {
+        "payments": _payments(args.rows, raw=False),
+        "payments (raw Decimal/datetime)": _payments(args.rows, raw=True),
+        "courses": _courses(args.rows, raw=False),
+    }
+
+    print(f"{args.rows} rows, median of {args.repeat} runs, full response build (ms)")
+    with app.app_context():
+        for label, payload in payloads.items():
+            timings = {
+                name: _time(lambda provider=provider: provider.response(payload), args.repeat)
+                for name, provider in providers.items()
+            }
+            speedup = timings["stdlib"] / timings["orjson"]
+            print(
+                f"{label:>32}: stdlib {timings['stdlib']:8.2f}  "
+                f"orjson {timings['orjson']:8.2f}  ({speedup:.1f}x)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
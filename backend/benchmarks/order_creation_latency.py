@@ -0,0 +1,79 @@
+"""Measure ``/api/payments/create-order`` latency against the local Razorpay stub.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.order_creation_latency --requests 200 --provider-latency 0.005
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from benchmarks.razorpay_stub import RazorpayStub
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--provider-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    stub = RazorpayStub(latency=args.provider_latency).start()
+    os.environ.update(
+        RAZORPAY_API_BASE=stub.base_url,
+        RAZORPAY_KEY_ID="rzp_test_stub",
+        RAZORPAY_SECRET="stub-secret",
+    )
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="order-latency-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+
+    from app import create_app
+    from app.db import db
+    from app.models import Course, User
+
+    app = create_app()
+
+    with app.app_context():
+        instructor = User(name="Bench", email=f"bench-{time.time_ns()}@bench.local", password_hash="x")
+        db.session.add(instructor)
+        db.session.flush()
+        courses = [
+            Course(title=f"Course {index}", price=Decimal("999.00"), instructor_id=instructor.id)
+            for index in range(args.requests)
+        ]
+        db.session.add_all(courses)
+        db.session.commit()
+        user_id, course_ids = instructor.id, [course.id for course in courses]
+
+    timings = []
+    with app.test_client() as client:
+        for course_id in course_ids:
+            started = time.perf_counter()
+            response = client.post(
+                "/api/payments/create-order", json={"course_id": course_id, "user_id": user_id}
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 201:
+                print(f"unexpected status {response.status_code}: {response.get_json()}")
+                return 1
+
+    stub.stop()
+    timings.sort()
+    print(f"orders created:       {len(timings)}")
+    print(f"provider connections: {stub.connections}")
+    print(f"p50 latency:          {statistics.median(timings):.2f} ms")
+    print(f"p95 latency:          {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+    print(f"max latency:          {timings[-1]:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
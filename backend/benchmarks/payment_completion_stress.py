@@ -0,0 +1,133 @@
+"""Stress parallel verify/webhook pairs against the same payment orders.
+
+Every order gets a ``/verify`` and a ``/webhook`` call fired at the same time
+from a thread pool. Afterwards each order must be ``paid`` with exactly one
+``Payment`` and its user exactly one ``Enrollment``.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.payment_completion_stress --orders 300 --workers 16
+
+``DATABASE_URL`` selects the database; a throwaway SQLite file is used when it
+is unset.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+SECRET = "stress-secret"
+
+
+def _configure_env() -> None:
+    os.environ.setdefault("RAZORPAY_SECRET", SECRET)
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="payment-stress-"), "stress.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+
+
+def _seed(app, orders: int) -> list[tuple[str, int, int]]:
+    from app.db import db
+    from app.models import Course, PaymentOrder, User
+
+    with app.app_context():
+        instructor = User(
+            name="Stress Instructor",
+            email=f"instructor-{time.time_ns()}@stress.local",
+            password_hash="x",
+            role="instructor",
+        )
+        db.session.add(instructor)
+        db.session.flush()
+        course = Course(title="Stress Course", price=Decimal("499.00"), instructor_id=instructor.id)
+        db.session.add(course)
+        db.session.flush()
+
+        seeded = []
+        for index in range(orders):
+            student = User(
+                name=f"Student {index}",
+                email=f"student-{index}-{time.time_ns()}@stress.local",
+                password_hash="x",
+            )
+            db.session.add(student)
+            db.session.flush()
+            order = PaymentOrder(
+                provider_order_id=f"order_stress_{index}_{time.time_ns()}",
+                user_id=student.id,
+                course_id=course.id,
+                amount=course.price,
+            )
+            db.session.add(order)
+            seeded.append((order, student.id))
+        db.session.commit()
+        return [(order.provider_order_id, user_id, course.id) for order, user_id in seeded]
+
+
+def _fire(app, path: str, payload: dict) -> int:
+    with app.test_client() as client:
+        return client.post(path, json=payload).status_code
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    _configure_env()
+    from app import create_app
+    from app.db import db
+    from app.models import Enrollment, Payment, PaymentOrder
+    from app.services.payments import compute_signature
+
+    app = create_app()
+
+    seeded = _seed(app, args.orders)
+
+    jobs = []
+    for provider_order_id, user_id, _ in seeded:
+        payment_id = f"pay_{provider_order_id}"
+        payload = {
+            "razorpay_order_id": provider_order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": compute_signature(provider_order_id, payment_id, SECRET),
+            "user_id": user_id,
+        }
+        jobs.append(("/api/payments/verify", payload))
+        jobs.append(("/api/payments/webhook", payload))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        statuses = list(pool.map(lambda job: _fire(app, *job), jobs))
+    elapsed = time.perf_counter() - started
+
+    failures = []
+    with app.app_context():
+        for provider_order_id, user_id, course_id in seeded:
+            order = PaymentOrder.query.filter_by(provider_order_id=provider_order_id).one()
+            payments = Payment.query.filter_by(order_id=order.id).count()
+            enrollments = Enrollment.query.filter_by(user_id=user_id, course_id=course_id).count()
+            if order.status != "paid" or payments != 1 or enrollments != 1:
+                failures.append((provider_order_id, order.status, payments, enrollments))
+        db.session.remove()
+
+    errors = [status for status in statuses if status != 200]
+    print(f"requests:    {len(jobs)} ({args.orders} verify/webhook pairs, {args.workers} workers)")
+    print(f"elapsed:     {elapsed:.2f}s ({len(jobs) / elapsed:.1f} req/s)")
+    print(f"non-200:     {len(errors)}")
+    print(f"violations:  {len(failures)}")
+    for failure in failures[:10]:
+        print("  order=%s status=%s payments=%d enrollments=%d" % failure)
+    return 1 if errors or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""In-process stand-in for the Razorpay Orders API.
+
+Speaks HTTP/1.1 with keep-alive so the pooled client behaves as it would
+against the real API, and counts accepted TCP connections so connection
+reuse can be checked.
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class RazorpayStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, *, latency: float = 0.0, capture: bool = True):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.capture = capture
+        self.orders: Dict[str, dict] = {}
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "RazorpayStub":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: RazorpayStub
+
+    def log_message(self, format, *args):  # noqa: A002 - silence request logging
+        pass
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.path != "/orders":
+            return self._send(404, {"error": {"description": "Not found"}})
+        order = {
+            "id": f"order_{secrets.token_hex(7)}",
+            "entity": "order",
+            "amount": payload.get("amount"),
+            "currency": payload.get("currency"),
+            "receipt": payload.get("receipt"),
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+        with self.server._lock:
+            self.server.orders[order["id"]] = order
+        self._send(200, order)
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = self.path.strip("/").split("/")
+        order = self.server.orders.get(parts[1]) if len(parts) >= 2 else None
+        if parts[0] != "orders" or order is None:
+            return self._send(404, {"error": {"description": "Not found"}})
+        if len(parts) == 2:
+            return self._send(200, order)
+        items = []
+        if self.server.capture:
+            items.append(
+                {"id": f"pay_{order['id'][6:]}", "order_id": order["id"], "status": "captured"}
+            )
+        self._send(200, {"entity": "collection", "count": len(items), "items": items})
+
+
+if __name__ == "__main__":
+    stub = RazorpayStub(9911)
+    print(f"Razorpay stub listening on {stub.base_url}")
+    stub.serve_forever()
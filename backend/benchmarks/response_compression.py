@@ -0,0 +1,101 @@
+"""Measure response size and latency of the course listing per content encoding.
+
+Seeds a throwaway SQLite database with ``--courses`` courses and requests the
+full listing with each encoding. For compressed encodings it reports a cold
+request (compressed-body cache cleared first) and a warm one (served from
+the cache), plus the transfer time on a slow mobile link.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.response_compression --courses 500 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+LISTING = "/api/courses/?fields=id,title,slug,description,price"
+WORDS = (
+    "python data models notebooks lessons exercises projects statistics pandas numpy "
+    "regression clustering vectors matrices plots quizzes review deployment testing"
+).split()
+
+
+def _median_ms(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--link-kbps", type=float, default=400.0, help="Link speed for the transfer estimate"
+    )
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="compression-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+
+    from app import compression, create_app
+    from app.db import db
+    from app.models import Course, User
+
+    app = create_app()
+    rng = random.Random(0)
+    with app.app_context():
+        instructor = User(name="Instructor", email="instructor@example.com", password_hash="x")
+        db.session.add(instructor)
+        db.session.flush()
+        db.session.add_all(
+            Course(
+                title=f"Course number {index}",
+                slug=f"course-{index}",
+                description=" ".join(rng.choice(WORDS) for _ in range(60)),
+                price=999,
+                instructor_id=instructor.id,
+            )
+            for index in range(args.courses)
+        )
+        db.session.commit()
+
+    client = app.test_client()
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli is not None else [])
+    print(f"{args.courses} courses, median of {args.repeat} requests")
+    for encoding in encodings:
+        headers = {"Accept-Encoding": encoding}
+        size = len(client.get(LISTING, headers=headers).data)
+        transfer_ms = size * 8 / args.link_kbps
+        if encoding == "identity":
+            latency = _median_ms(lambda: client.get(LISTING, headers=headers), args.repeat)
+            timings = f"server {latency:7.2f} ms"
+        else:
+
+            def cold():
+                compression._compressed.clear()
+                client.get(LISTING, headers=headers)
+
+            cold_ms = _median_ms(cold, args.repeat)
+            warm_ms = _median_ms(lambda: client.get(LISTING, headers=headers), args.repeat)
+            timings = f"server cold {cold_ms:7.2f} ms, cached {warm_ms:7.2f} ms"
+        print(
+            f"{encoding:>8}: {size:9d} bytes  {timings}  "
+            f"transfer at {args.link_kbps:.0f} kbit/s {transfer_ms:8.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
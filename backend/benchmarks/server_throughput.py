@@ -0,0 +1,142 @@
+"""Compare request throughput of ``flask run`` and gunicorn on the same endpoint.
+
+Each server is started on a free port with a freshly seeded SQLite database.
+It is then driven by ``--concurrency`` keep-alive clients for ``--duration``
+seconds.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.server_throughput --duration 10 --concurrency 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+import urllib3
+
+SERVERS = {
+    "flask run": ["{python}", "-m", "flask", "--app", "app", "run", "--port", "{port}"],
+    "gunicorn": ["{python}", "-m", "gunicorn", "wsgi:app", "--bind", "127.0.0.1:{port}"],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(database_url: str, courses: int) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+    from app import create_app
+    from app.db import db
+    from app.models import Course, User
+
+    app = create_app()
+    with app.app_context():
+        instructor = User(name="Bench", email=f"bench-{time.time_ns()}@bench.local", password_hash="x")
+        db.session.add(instructor)
+        db.session.flush()
+        db.session.add_all(
+            Course(title=f"Course {index}", price=Decimal("499.00"), instructor_id=instructor.id)
+            for index in range(courses)
+        )
+        db.session.commit()
+
+
+def _wait_ready(http: urllib3.PoolManager, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if http.request("GET", url, retries=False).status == 200:
+                return
+        except urllib3.exceptions.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not become ready")
+
+
+def _drive(url: str, concurrency: int, duration: float) -> tuple[list[float], int]:
+    http = urllib3.PoolManager(maxsize=concurrency, retries=False)
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client() -> None:
+        nonlocal errors
+        local, failed = [], 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                ok = http.request("GET", url).status == 200
+            except urllib3.exceptions.HTTPError:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - started)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--path", default="/api/courses/")
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args(argv)
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='throughput-'), 'bench.db')}"
+    _seed(database_url, args.courses)
+    env = dict(os.environ, DATABASE_URL=database_url, GUNICORN_ACCESS_LOG="")
+
+    print(f"{args.concurrency} clients, {args.duration:.0f}s, GET {args.path}, {os.cpu_count()} CPUs")
+    for name in args.servers:
+        port = _free_port()
+        command = [part.format(python=sys.executable, port=port) for part in SERVERS[name]]
+        server = subprocess.Popen(
+            command, cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            url = f"http://127.0.0.1:{port}{args.path}"
+            _wait_ready(urllib3.PoolManager(), url)
+            latencies, errors = _drive(url, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float("nan")
+        print(
+            f"{name:>10}: {len(latencies) / args.duration:8.1f} req/s  "
+            f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+            f"errors {errors}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""Run parallel enrollment writes and catalog reads against SQLite.
+
+Several processes, like server workers, each run writer and reader threads.
+Writers record manual payments (each one creates an order, a payment and an
+enrollment); readers fetch the catalog and enrollment access checks. The run
+is repeated with the SQLite PRAGMA profile off and on, each in a fresh
+interpreter and database file. Any ``database is locked`` or other server
+error counts as a failure.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.sqlite_concurrency --processes 3 --writers 2 --readers 6 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+def _seed(app, students: int, courses: int) -> tuple[list[int], list[int], int]:
+    from app.db import db
+    from app.models import Course, User
+
+    with app.app_context():
+        admin = User(name="Admin", email="admin@bench.local", password_hash="x", role="admin")
+        db.session.add(admin)
+        db.session.flush()
+        course_rows = [
+            Course(title=f"Course {index}", slug=f"course-{index}", price=499, instructor_id=admin.id)
+            for index in range(courses)
+        ]
+        student_rows = [
+            User(name=f"Student {index}", email=f"student-{index}@bench.local", password_hash="x")
+            for index in range(students)
+        ]
+        db.session.add_all(course_rows + student_rows)
+        db.session.commit()
+        return [c.id for c in course_rows], [s.id for s in student_rows], admin.id
+
+
+_state: dict = {}
+
+
+def _run_threads(slot: int) -> dict:
+    """Drive the write/read mix from one process; returns raw latency samples."""
+    app, args = _state["app"], _state["args"]
+    course_ids, student_ids = _state["course_ids"], _state["student_ids"]
+    admin_headers, student_headers = _state["admin_headers"], _state["student_headers"]
+    # Connections opened before the fork must not be shared with the parent.
+    with app.app_context():
+        for engine in _state["engines"]:
+            engine.dispose(close=False)
+
+    deadline = time.monotonic() + args.seconds
+    lock = threading.Lock()
+    results = {"write": [], "read": [], "errors": 0, "locked": 0}
+    counter = iter(range(slot, 10**9, args.processes))
+
+    def record(kind: str, started: float, status: int, body: bytes) -> None:
+        with lock:
+            if status >= 500:
+                results["errors"] += 1
+                results["locked"] += b"locked" in body
+            else:
+                results[kind].append(time.perf_counter() - started)
+
+    def writer() -> None:
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            index = next(counter)
+            payload = {
+                "user_id": student_ids[index % len(student_ids)],
+                "course_id": course_ids[index % len(course_ids)],
+            }
+            started = time.perf_counter()
+            try:
+                response = client.post(
+                    "/api/payments/manual-record", json=payload, headers=admin_headers
+                )
+                record("write", started, response.status_code, response.data)
+            except Exception as exc:  # the test client re-raises unhandled errors
+                record("write", started, 500, str(exc).encode())
+
+    def reader(thread: int) -> None:
+        client = app.test_client()
+        headers = student_headers[(slot * args.readers + thread) % len(student_headers)]
+        paths = ["/api/courses/"] + [f"/api/courses/{cid}/access" for cid in course_ids[:5]]
+        step = 0
+        while time.monotonic() < deadline:
+            path = paths[step % len(paths)]
+            step += 1
+            started = time.perf_counter()
+            try:
+                response = client.get(path, headers=headers)
+                record("read", started, response.status_code, response.data)
+            except Exception as exc:
+                record("read", started, 500, str(exc).encode())
+
+    with ThreadPoolExecutor(max_workers=args.writers + args.readers) as pool:
+        futures = [pool.submit(writer) for _ in range(args.writers)]
+        futures += [pool.submit(reader, thread) for thread in range(args.readers)]
+        for future in futures:
+            future.result()
+    return results
+
+
+def _child(args) -> dict:
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.database}"
+    os.environ["SQLITE_PRAGMAS"] = args.pragmas
+    os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+    os.environ.setdefault("COMPRESS_ENABLED", "false")
+
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    app.logger.disabled = True
+    course_ids, student_ids, admin_id = _seed(app, args.students, args.courses)
+    with app.app_context():
+        admin_headers = {
+            "Authorization": "Bearer "
+            + create_access_token(identity=str(admin_id), additional_claims={"roles": ["admin"]})
+        }
+        student_headers = [
+            {
+                "Authorization": "Bearer "
+                + create_access_token(identity=str(user_id), additional_claims={"roles": ["student"]})
+            }
+            for user_id in student_ids
+        ]
+        engines = list(db.engines.values())
+    _state.update(
+        app=app,
+        args=args,
+        course_ids=course_ids,
+        student_ids=student_ids,
+        admin_headers=admin_headers,
+        student_headers=student_headers,
+        engines=engines,
+    )
+
+    # One process per server worker, as under gunicorn.
+    with multiprocessing.get_context("fork").Pool(args.processes) as pool:
+        parts = pool.map(_run_threads, range(args.processes))
+
+    summary = {
+        "errors": sum(part["errors"] for part in parts),
+        "locked": sum(part["locked"] for part in parts),
+    }
+    for kind in ("write", "read"):
+        samples = [sample for part in parts for sample in part[kind]]
+        summary[kind] = {
+            "ok": len(samples),
+            "per_second": len(samples) / args.seconds,
+            "p50_ms": _percentile(samples, 0.50),
+            "p95_ms": _percentile(samples, 0.95),
+            "p99_ms": _percentile(samples, 0.99),
+        }
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=3, help="Server worker processes")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads per process")
+    parser.add_argument("--readers", type=int, default=6, help="Reader threads per process")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--pragmas", default="true", help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_child(args)))
+        return 0
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(
+        f"{args.processes} processes x ({args.writers} writers + {args.readers} readers), "
+        f"{args.seconds:.0f}s per run, "
+        f"{args.students} students x {args.courses} courses"
+    )
+    for label, pragmas in (("default", "false"), ("profile", "true")):
+        database = os.path.join(tempfile.mkdtemp(prefix="sqlite-bench-"), "bench.db")
+        command = [
+            sys.executable, "-m", "benchmarks.sqlite_concurrency", "--child",
+            "--pragmas", pragmas, "--database", database, "--processes", str(args.processes),
+            "--writers", str(args.writers), "--readers", str(args.readers),
+            "--seconds", str(args.seconds), "--students", str(args.students),
+            "--courses", str(args.courses),
+        ]  # fmt: skip
+        output = subprocess.run(
+            command, cwd=backend_dir, capture_output=True, text=True, check=True
+        ).stdout
+        summary = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:>8}: {summary['errors']} errors ({summary['locked']} 'database is locked')")
+        for kind in ("write", "read"):
+            stats = summary[kind]
+            print(
+                f"{'':>10}{kind:>5}: {stats['per_second']:7.1f}/s  "
+                f"p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms  "
+                f"p99 {stats['p99_ms']:7.1f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Measure cold-start time: package import, ``create_app()`` and the first request.
+
+Every run is a fresh interpreter, as a new worker under autoscaling would be.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.startup_time --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+application.test_client().get("/health")
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "total_ms": (served - started) * 1000,
+}))
+"""
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        path = os.path.join(tempfile.mkdtemp(prefix="startup-"), "startup.db")
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            cwd=backend_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"runs: {args.runs}  database: {env['DATABASE_URL']}")
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms"):
+        values = [sample[key] for sample in samples]
+        print(f"{key:>17}: median {statistics.median(values):7.1f}  max {max(values):7.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
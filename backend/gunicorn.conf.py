@@ -0,0 +1,61 @@
+"""Gunicorn settings; ``gunicorn wsgi:app`` run from ``backend/`` loads this file.
+
+Every value can be overridden through a ``GUNICORN_*`` environment variable.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Load the app once in the master so workers share its memory pages and a
+# broken deploy fails before any worker starts.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Recycle workers gradually to contain slow leaks; jitter keeps them from
+# restarting together.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+# Slightly above the load balancer's idle timeout, so the balancer closes idle
+# connections first and never reuses one gunicorn has just dropped.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# An empty GUNICORN_ACCESS_LOG turns access logging off.
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+# One pooled connection per thread unless the pool is sized explicitly.
+os.environ.setdefault("DB_POOL_SIZE", str(threads))
+
+
+def post_fork(server, worker):
+    """Drop state inherited from the preloading master."""
+    from app.db import db
+    from app.services import razorpay_client
+    from app.services.events import broker, init_events
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the master's sockets alone; the worker opens its own.
+            engine.dispose(close=False)
+    razorpay_client.reset_client()
+    # The pub/sub listener thread did not survive the fork; start this worker's own.
+    broker.fanout = None
+    init_events(app)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,31 @@
+"""Add webhook_events table for webhook delivery deduplication."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250210_01"
+down_revision = "20250208_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_key", sa.String(length=255), nullable=False),
+        sa.Column("provider_order_id", sa.String(length=255), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.UniqueConstraint("event_key", name="uq_webhook_events_event_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("webhook_events")
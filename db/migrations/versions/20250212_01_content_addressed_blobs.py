@@ -0,0 +1,50 @@
+"""Add content-addressed blobs and link attachments to them."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250212_01"
+down_revision = "20250210_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "blobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("storage_key", sa.String(length=255), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.UniqueConstraint("sha256", name="uq_blobs_sha256"),
+    )
+    op.create_index("ix_blobs_ref_count", "blobs", ["ref_count"], unique=False)
+
+    # attachments is created by the application on some installs; skip if absent.
+    if sa.inspect(op.get_bind()).has_table("attachments"):
+        with op.batch_alter_table("attachments") as batch_op:
+            batch_op.add_column(sa.Column("blob_id", sa.Integer(), nullable=True))
+            batch_op.create_index("ix_attachments_blob_id", ["blob_id"], unique=False)
+            batch_op.create_foreign_key(
+                "fk_attachments_blob_id_blobs", "blobs", ["blob_id"], ["id"]
+            )
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("attachments"):
+        with op.batch_alter_table("attachments") as batch_op:
+            batch_op.drop_constraint("fk_attachments_blob_id_blobs", type_="foreignkey")
+            batch_op.drop_index("ix_attachments_blob_id")
+            batch_op.drop_column("blob_id")
+
+    op.drop_index("ix_blobs_ref_count", table_name="blobs")
+    op.drop_table("blobs")
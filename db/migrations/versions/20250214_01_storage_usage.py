@@ -0,0 +1,44 @@
+"""Add per-user storage_usage counters and backfill them from attachments."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250214_01"
+down_revision = "20250212_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "storage_usage",
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("bytes_used", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("attachment_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name="fk_storage_usage_user_id_users"),
+    )
+    op.create_index("ix_storage_usage_bytes_used", "storage_usage", ["bytes_used"], unique=False)
+
+    if sa.inspect(op.get_bind()).has_table("attachments"):
+        op.execute(
+            """
+            INSERT INTO storage_usage (user_id, bytes_used, attachment_count, updated_at)
+            SELECT created_by_user_id, COALESCE(SUM(size_bytes), 0), COUNT(*), CURRENT_TIMESTAMP
+            FROM attachments
+            WHERE created_by_user_id IS NOT NULL
+            GROUP BY created_by_user_id
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_storage_usage_bytes_used", table_name="storage_usage")
+    op.drop_table("storage_usage")
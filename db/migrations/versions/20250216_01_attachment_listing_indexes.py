@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination of attachments."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250216_01"
+down_revision = "20250214_01"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_attachments_owner_created", ["created_by_user_id", "created_at", "id"]),
+    (
+        "ix_attachments_owner_type_created",
+        ["created_by_user_id", "content_type", "created_at", "id"],
+    ),
+    ("ix_attachments_created", ["created_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    # attachments is created by the application on some installs; skip if absent.
+    if not sa.inspect(op.get_bind()).has_table("attachments"):
+        return
+    for name, columns in INDEXES:
+        op.create_index(name, "attachments", columns, unique=False)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("attachments"):
+        return
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="attachments")
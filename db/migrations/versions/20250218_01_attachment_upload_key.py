@@ -0,0 +1,28 @@
+"""Record the signed upload each attachment was created from."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20250218_01"
+down_revision = "20250216_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # attachments is created by the application on some installs; skip if absent.
+    if not sa.inspect(op.get_bind()).has_table("attachments"):
+        return
+    with op.batch_alter_table("attachments") as batch_op:
+        batch_op.add_column(sa.Column("upload_key", sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint("uq_attachments_upload_key", ["upload_key"])
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("attachments"):
+        return
+    with op.batch_alter_table("attachments") as batch_op:
+        batch_op.drop_constraint("uq_attachments_upload_key", type_="unique")
+        batch_op.drop_column("upload_key")
@@ -145,3 +145,21 @@ export const verifyPayment = async (payload: {
       : null,
   };
 };
+
+export const subscribeToPaymentStatus = (
+  orderId: string,
+  onStatus: (status: string) => void,
+): (() => void) => {
+  const baseUrl = import.meta.env.VITE_API_BASE_URL || '';
+  const source = new EventSource(`${baseUrl}/api/payments/orders/${encodeURIComponent(orderId)}/events`);
+
+  source.addEventListener('status', (event) => {
+    const { status } = JSON.parse((event as MessageEvent<string>).data) as { status: string };
+    onStatus(status);
+    if (status !== 'created') {
+      source.close();
+    }
+  });
+
+  return () => source.close();
+};